@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Compares the crawler's HTML parser backends on stored pages.
+
+Usage:
+    python benchmarks/parser_benchmark.py FIXTURE_DIR [--repeat 5]
+    python benchmarks/parser_benchmark.py --cache cache/crawler_cache [--repeat 5]
+
+FIXTURE_DIR holds saved *.html pages; --cache reads the pages stored by requests_cache instead.
+For every backend it reports the mean parse time per page and the peak Python heap per page
+(tracemalloc does not see allocations made inside C parsers such as lexbor).
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from cyberthreat_article_process.crawler.html_parsers import available_parsers, get_parser
+
+
+def load_fixtures(fixture_dir=None, cache=None):
+    pages = []
+    if fixture_dir:
+        for path in sorted(glob.glob(os.path.join(fixture_dir, "*.html"))):
+            with open(path, encoding="utf-8", errors="replace") as file:
+                pages.append((os.path.basename(path), file.read()))
+    if cache:
+        import requests_cache
+        backend = requests_cache.SQLiteCache(cache)
+        for response in backend.responses.values():
+            if "html" in response.headers.get("Content-Type", ""):
+                pages.append((response.url, response.text))
+    return pages
+
+
+def full_parse_baseline(html):
+    """
+    What the crawler did before the backends: a full html.parser parse per extraction.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    links = [(link.get("href"), link.get_text(strip=True)) for link in soup.find_all("a", href=True)]
+    article = soup.find("article") or soup.find("div", class_="blog-content")
+    content = "\n".join(p.get_text(strip=True) for p in article.find_all("p")) if article else ""
+    return links, content
+
+
+def measure(parse, pages, repeat):
+    timings = []
+    peaks = []
+    for _, html in pages:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parse(html)
+            timings.append(time.perf_counter() - start)
+        tracemalloc.start()
+        parse(html)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.mean(timings) * 1000, statistics.mean(peaks) / 1024
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("fixture_dir", nargs="?")
+    arg_parser.add_argument("--cache", help="requests_cache SQLite path, e.g. cache/crawler_cache")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    pages = load_fixtures(args.fixture_dir, args.cache)
+    if not pages:
+        arg_parser.error("No HTML pages found.")
+    print(f"{len(pages)} pages, {args.repeat} runs each\n")
+    print(f"{'backend':<28}{'ms/page':>10}{'peak KiB/page':>16}")
+
+    ms, kib = measure(full_parse_baseline, pages, args.repeat)
+    print(f"{'html.parser (full parse)':<28}{ms:>10.2f}{kib:>16.1f}")
+    for name in available_parsers():
+        parser = get_parser(name)
+        ms, kib = measure(lambda html: (parser.parse_links(html), parser.parse_article(html, "")), pages, args.repeat)
+        print(f"{name:<28}{ms:>10.2f}{kib:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
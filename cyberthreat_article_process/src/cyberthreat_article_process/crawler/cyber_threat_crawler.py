@@ -1,25 +1,163 @@
+import asyncio
+import os
 import chromadb
 import requests
-from bs4 import BeautifulSoup
+import aiohttp
 from urllib.parse import urljoin, urlparse
 import re
 import time
+import datetime
 import hashlib
 import random
 import concurrent.futures
 import logging
+import queue
+from collections import Counter
 import threading
 import urllib.robotparser as robotparser
+from contextlib import contextmanager, asynccontextmanager
 import requests_cache
 
+from cyberthreat_article_process.crawler.html_parsers import get_parser
+from cyberthreat_article_process.crawler.known_ids import KnownIds
+from cyberthreat_article_process.crawler.report_writer import ReportWriter
+from cyberthreat_article_process.crawler.validator_store import ValidatorStore
+from cyberthreat_article_process.crawler.watermark_store import WatermarkStore
+from cyberthreat_article_process.embeddings.cached_embedder import get_embedding_function
+from cyberthreat_article_process.ledger.processing_ledger import ProcessingLedger
+from cyberthreat_article_process.search.bm25_index import BM25Index
+from cyberthreat_article_process.search.semantic_search import mark_written
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
+class HostBucket:
+    """
+    Token bucket plus an in-flight limit for a single host (netloc).
+    Tokens are reserved in arrival order, so waiting callers form a FIFO queue per host.
+    """
+    def __init__(self, rate, burst, max_in_flight):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.max_in_flight = max_in_flight
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.async_slots = None
+        self.requests = 0
+        self.waited = 0.0
+
+    def set_rate(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = min(self.tokens, burst)
+
+    def reserve(self) -> float:
+        """
+        Takes one token and returns how many seconds the caller must wait before using it.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        self.requests += 1
+        delay = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        self.waited += delay
+        return delay
+
+
+class HostScheduler:
+    """
+    Per-host politeness scheduler.
+    - Every netloc gets its own token bucket (default_rate requests/sec, bursts of `burst`).
+    - robots.txt Crawl-delay / Request-rate hints override the default rate for that host.
+    - At most max_in_flight requests per host, so a slow host cannot take every worker or
+      connection away from the others; throughput grows with the number of hosts.
+    """
+    def __init__(self, default_rate=2.0, burst=4, max_in_flight=4):
+        self.default_rate = default_rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url) -> HostBucket:
+        netloc = urlparse(url).netloc
+        with self.lock:
+            if netloc not in self.buckets:
+                self.buckets[netloc] = HostBucket(self.default_rate, self.burst, self.max_in_flight)
+            return self.buckets[netloc]
+
+    def configure_from_robots(self, url, rp, user_agent):
+        """
+        Applies the Crawl-delay / Request-rate hints of a parsed robots.txt to the url's host.
+        """
+        request_rate = rp.request_rate(user_agent)
+        crawl_delay = rp.crawl_delay(user_agent)
+        rate = None
+        if request_rate and request_rate.requests and request_rate.seconds:
+            rate = request_rate.requests / request_rate.seconds
+        if crawl_delay:
+            delay_rate = 1 / float(crawl_delay)
+            rate = min(rate, delay_rate) if rate else delay_rate
+        if rate:
+            bucket = self.bucket(url)
+            with self.lock:
+                bucket.set_rate(min(rate, self.default_rate), 1)
+            logging.info(f"robots.txt rate for {urlparse(url).netloc}: {rate:.3f} requests/sec")
+
+    def reset_async(self):
+        """
+        Drops the asyncio semaphores, they are bound to the event loop that first used them.
+        """
+        with self.lock:
+            for bucket in self.buckets.values():
+                bucket.async_slots = None
+
+    @contextmanager
+    def slot(self, url):
+        bucket = self.bucket(url)
+        with bucket.slots:
+            with self.lock:
+                delay = bucket.reserve()
+            if delay:
+                time.sleep(delay)
+            yield
+
+    @asynccontextmanager
+    async def slot_async(self, url):
+        bucket = self.bucket(url)
+        if bucket.async_slots is None:
+            bucket.async_slots = asyncio.Semaphore(bucket.max_in_flight)
+        async with bucket.async_slots:
+            with self.lock:
+                delay = bucket.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            yield
+
+    def stats(self):
+        with self.lock:
+            return {
+                netloc: {"requests": bucket.requests, "rate": bucket.rate, "waited": round(bucket.waited, 2)}
+                for netloc, bucket in self.buckets.items()
+            }
+
+
 class CyberThreatCrawler:
-    def __init__(self, start_url, db_path="./db/cyberthreat_reports", max_pages=7, max_workers=10):
+    def __init__(self, start_url, db_path="./db/cyberthreat_reports", max_pages=7, max_workers=10,
+                 use_async=False, max_concurrency=20, requests_per_host=2.0, max_in_flight_per_host=4,
+                 validators_path="cache/validators.sqlite", incremental=False, max_article_age_days=None,
+                 watermarks_path="cache/watermarks.sqlite", pagination_window=4, html_parser="auto",
+                 write_batch_size=64, flush_interval=5.0, journal_path="cache/report_journal.jsonl"):
         self.start_url = start_url
         self.max_pages = max_pages
         self.max_workers = max_workers
+        # Async mode: one event loop with at most max_concurrency requests in flight,
+        # instead of nested thread pools (up to max_workers ** 2 blocking threads).
+        self.use_async = use_async
+        self.max_concurrency = max_concurrency
+        self.semaphore = None
         self.connect_timeout = 10
         self.read_timeout = 20
         self.retries = 5
@@ -32,13 +170,47 @@ class CyberThreatCrawler:
         self.use_selenium = False
         self.robot_user_agents = "CyberBlogCrawler"
         self.chroma_client = chromadb.PersistentClient(path=db_path)
-        self.collection = self.chroma_client.get_or_create_collection(name="reports")
-        self.existing = self.collection.get()
-        self.add_lock = threading.Lock()
-        self.added_ids = set(self.existing["ids"]) if "ids" in self.existing else set()
+        self.collection = self.chroma_client.get_or_create_collection(
+            name="reports", embedding_function=get_embedding_function()
+        )
+        # Stored IDs are checked on demand (ID-only, batched) instead of loading the whole collection
+        self.added_ids = KnownIds(self.collection)
+        # Reports are journaled and written in batches (by size or every flush_interval seconds)
+        # Long articles are also stored as overlapping passages linked to their report for retrieval
+        self.chunk_collection = self.chroma_client.get_or_create_collection(
+            name="report_chunks", embedding_function=get_embedding_function()
+        )
+        self.writer = ReportWriter(self.collection, journal_path, write_batch_size, flush_interval,
+                                   chunk_collection=self.chunk_collection)
+        # Lifecycle state of every article, next to the Chroma DB
+        self.ledger = ProcessingLedger(os.path.join(os.path.dirname(db_path.rstrip("/")), "processing_state.sqlite"))
+        # Keyword (BM25) index over title + content for exact identifiers (CVEs, malware names, IPs)
+        self.lexical_index = BM25Index(os.path.join(os.path.dirname(db_path.rstrip("/")), "report_terms.sqlite"))
         self.session = requests.Session()
         self.robot_parsers = {}
+        self.triage_stats = Counter()
+        # Streaming mode: bounded queue of newly stored report IDs (see open_stream)
+        self.stream = None
+        self.stats_lock = threading.Lock()
+        self.scheduler = HostScheduler(default_rate=requests_per_host, max_in_flight=max_in_flight_per_host)
         requests_cache.install_cache('cache/crawler_cache', expire_after=3600)
+        # Listing pages are revalidated with If-None-Match / If-Modified-Since (None disables it)
+        self.validators = ValidatorStore(validators_path) if validators_path else None
+        # Incremental mode: stop paginating once a listing page has no new article newer than
+        # the site's high-water mark (or than max_article_age_days)
+        self.incremental = incremental
+        self.max_article_age_days = max_article_age_days
+        self.watermarks = WatermarkStore(watermarks_path) if incremental else None
+        # Per crawled site: watermark taken at crawl start, newest (date, id) seen, and failed crawls
+        self.crawl_watermarks = {}
+        self.crawl_newest = {}
+        self.crawl_incomplete = set()
+        # Predicted listing pages that failed; follow_window decides whether that was a real failure
+        self.failed_predictions = set()
+        # Number of /page/N/ listing pages fetched concurrently once the pattern is detected
+        self.pagination_window = pagination_window
+        # "auto" picks the fastest installed backend: selectolax, lxml, then html.parser
+        self.parser = get_parser(html_parser)
         
     def get_headers_and_proxy(self):
         headers = {
@@ -61,7 +233,11 @@ class CyberThreatCrawler:
         canonical = self.canonicalize_url(url)
         return hashlib.md5(canonical.encode('utf-8')).hexdigest()
     
-    def allowed_by_robots(self, url: str) -> bool:
+    def get_robot_parser(self, url: str):
+        """
+        Returns the cached robots.txt parser of the url's host (None if it could not be read).
+        The first read also feeds its Crawl-delay / Request-rate hints to the scheduler.
+        """
         parsed = urlparse(url)
         base_url = f"{parsed.scheme}://{parsed.netloc}"
         if base_url not in self.robot_parsers:
@@ -69,15 +245,28 @@ class CyberThreatCrawler:
             rp.set_url(urljoin(base_url, "/robots.txt"))
             try:
                 rp.read()
+                self.scheduler.configure_from_robots(url, rp, self.robot_user_agents)
             except Exception as e:
                 logging.warning(f"Could not read robots.txt for {base_url}: {e}")
                 rp = None
             self.robot_parsers[base_url] = rp
-        rp = self.robot_parsers.get(base_url)
+        return self.robot_parsers.get(base_url)
+
+    def allowed_by_robots(self, url: str) -> bool:
+        rp = self.get_robot_parser(url)
         if rp:
             return rp.can_fetch(self.robot_user_agents, url)
         return True
     
+    def polite_get(self, url: str, headers=None, proxies=None):
+        """
+        session.get that waits for the host's scheduler slot first.
+        """
+        self.get_robot_parser(url)
+        with self.scheduler.slot(url):
+            return self.session.get(url, headers=headers, proxies=proxies,
+                                    timeout=(self.connect_timeout, self.read_timeout))
+
     def is_new_report(self, url: str) -> bool:
         report_id = self.generate_id(url)
         return report_id not in self.added_ids
@@ -94,120 +283,266 @@ class CyberThreatCrawler:
             return False
         return True
     
-    def fetch_article_title(self, url: str, retries=None, backoff_factor=None) -> str:
+    def article_date(self, url: str) -> str:
         """
-        Fallback function to fetch a better article title from the article page's <title> tag.
+        Returns the "YYYY/MM" date embedded in an article URL, or an empty string.
         """
-        retries = retries if retries is not None else self.retries
-        backoff_factor = backoff_factor if backoff_factor is not None else self.backoff_factor
-        attempt = 0
-        while attempt < retries:
-            try:
-                headers, proxies = self.get_headers_and_proxy()
-                response = self.session.get(url, headers=headers, proxies=proxies,
-                                    timeout=(self.connect_timeout, self.read_timeout))
-                if response.status_code != 200:
-                    return ""
-                soup = BeautifulSoup(response.text, "html.parser")
-                if soup.title:
-                    return soup.title.get_text(strip=True)
-                return ""
-            except Exception as e:
-                logging.error(f"Exception fetching title from {url}: {e}")
-                attempt += 1
-                time.sleep(backoff_factor ** attempt)
-        return ""
-    
-    def fetch_article_content(self, url: str, retries=None, backoff_factor=None) -> str:
+        match = re.search(r"/(\d{4})/(\d{2})/", urlparse(url).path)
+        return f"{match.group(1)}/{match.group(2)}" if match else ""
+
+    def age_cutoff(self) -> str:
         """
-        Fetch the article's main content with retry mechanism.
-        Uses a tuple timeout and respects robots.txt.
+        Oldest "YYYY/MM" still worth storing in incremental mode (max_article_age_days), or "".
+        """
+        if self.max_article_age_days is None:
+            return ""
+        oldest = datetime.date.today() - datetime.timedelta(days=self.max_article_age_days)
+        return oldest.strftime("%Y/%m")
+
+    def begin_crawl(self, url: str):
+        """
+        Incremental mode: takes the site's watermark once, when its crawl starts.
+        The watermark only moves again when the crawl is complete (end_crawl).
+        """
+        if not self.watermarks:
+            return
+        site = urlparse(url).netloc
+        self.crawl_watermarks[site] = self.watermarks.get(site)
+        self.crawl_newest.pop(site, None)
+        self.crawl_incomplete.discard(site)
+
+    def end_crawl(self, url: str):
+        """
+        Advances the site's watermark to the newest article seen, unless a listing page failed:
+        an interrupted crawl keeps the old mark, so the next run paginates back to the missed pages.
+        """
+        if not self.watermarks:
+            return
+        site = urlparse(url).netloc
+        if site in self.crawl_incomplete:
+            logging.info(f"Incremental crawl of {site} was incomplete, watermark not advanced.")
+            return
+        newest = self.crawl_newest.get(site)
+        if newest:
+            self.watermarks.advance(site, *newest)
+
+    def crawl_failed(self, url: str):
+        with self.stats_lock:
+            self.crawl_incomplete.add(urlparse(url).netloc)
+
+    def listing_page_failed(self, url: str, predicted=False):
+        """
+        A listing page could not be fetched. A link-followed page marks the crawl incomplete;
+        a predicted /page/N/ URL past the blog's last page simply doesn't exist, so follow_window
+        only counts it as a failure if the previous page actually linked to it.
+        """
+        if predicted:
+            with self.stats_lock:
+                self.failed_predictions.add(url)
+        else:
+            self.crawl_failed(url)
+
+    def has_watermark(self, url: str) -> bool:
+        return bool(self.crawl_watermarks.get(urlparse(url).netloc))
+
+    def should_continue_pagination(self, url: str, candidates) -> bool:
+        """
+        In incremental mode, pagination ends at a listing page that has:
+        - only known articles, once a previous crawl of the site completed (it has a watermark,
+          so everything older is stored); without one the crawl keeps backfilling up to max_pages;
+        - or only new articles older than max_article_age_days.
+        New articles are never a reason to stop just because they are older than the watermark.
+        """
+        if not self.incremental:
+            return True
+        if not candidates:
+            if self.has_watermark(url):
+                logging.info(f"Incremental crawl: only known articles on {url}, stopping.")
+                return False
+            return True
+        cutoff = self.age_cutoff()
+        if cutoff and all(self.article_date(link) and self.article_date(link) < cutoff for link in candidates):
+            logging.info(f"Incremental crawl: only articles older than {cutoff} on {url}, stopping.")
+            return False
+        return True
+
+    def extract_article(self, html: str, url: str) -> dict:
+        """
+        Parses an article page once and returns everything store_report needs:
+        {"title", "content", "published", "author", "canonical_url"}
+        Missing fields are empty strings.
+        """
+        article = self.parser.parse_article(html, url)
+        if article["canonical_url"]:
+            article["canonical_url"] = self.canonicalize_url(article["canonical_url"])
+        return article
+
+    def find_next_page(self, links, url):
+        """
+        Dynamically extracts the next page link using candidate texts.
+        links are the (href, text) pairs of the page.
+        Returns the next page URL (or None if not found).
+        """
+        candidate_texts = re.compile(r"(next|older posts|›)", re.IGNORECASE)
+        current_domain = urlparse(url).netloc
+        for href, text in links:
+            if href and candidate_texts.search(text):
+                potential = urljoin(url, href)
+                if urlparse(potential).netloc == current_domain and "/page/" in potential:
+                    return potential
+        return None
+
+    def fetch_article(self, url: str, retries=None, backoff_factor=None):
+        """
+        Downloads and parses an article page exactly once.
+        Returns the extract_article record, or None if blocked by robots.txt or the fetch failed.
         """
         if not self.allowed_by_robots(url):
             logging.info(f"Blocked by robots.txt: {url}")
-            return ""
+            return None
         retries = retries if retries is not None else self.retries
         backoff_factor = backoff_factor if backoff_factor is not None else self.backoff_factor
-        if self.use_selenium:
-            # Selenium integration not included in this final version
-            return ""
         attempt = 0
         while attempt < retries:
             try:
                 headers, proxies = self.get_headers_and_proxy()
-                response = self.session.get(url, headers=headers, proxies=proxies,
-                                    timeout=(self.connect_timeout, self.read_timeout))
+                response = self.polite_get(url, headers=headers, proxies=proxies)
                 if response.status_code != 200:
-                    logging.warning(f"Error fetching content from {url}: HTTP {response.status_code}")
-                    return ""
-                soup = BeautifulSoup(response.text, "html.parser")
-                article = soup.find("article") or soup.find("div", class_="blog-content")
-                if article:
-                    paragraphs = article.find_all("p")
-                    content = "\n".join(p.get_text(strip=True) for p in paragraphs)
-                    return content
-                return ""
+                    logging.warning(f"Error fetching article {url}: HTTP {response.status_code}")
+                    return None
+                return self.extract_article(response.text, url)
             except Exception as e:
-                logging.error(f"Exception fetching article content from {url}: {e}")
+                logging.error(f"Exception fetching article {url}: {e}")
                 attempt += 1
                 sleep_time = backoff_factor ** attempt
                 logging.info(f"Retrying {url} in {sleep_time} seconds (attempt {attempt}/{retries})...")
                 time.sleep(sleep_time)
-        return ""
-    
-    def store_report(self, title: str, url: str, content: str):
+        return None
+
+    def store_report(self, title: str, url: str, content: str, published="", author="", canonical_url=""):
         """
-        Store the blog post in ChromaDB with metadata.
-        Uses a lock and a global duplicate set to prevent duplicate entries.
+        Store the blog post in ChromaDB with metadata (through the write-behind batch writer).
+        Publish date, author and the page's own canonical link are stored when known.
+        Duplicate entries are prevented by claiming the ID in the known-ID index, in memory only:
+        triage already checked the collection, so no Chroma query runs while threads wait on the claim.
         """
         canonical = self.canonicalize_url(url)
         report_id = self.generate_id(canonical)
-        with self.add_lock:
-            if report_id in self.added_ids:
-                return
-            self.added_ids.add(report_id)
-            try:
-                self.collection.add(
-                    ids=[report_id],
-                    documents=[content],
-                    metadatas=[{"title": title, "url": canonical, "processed": False}]
-                )
-                logging.info(f"Stored: {title} → {canonical}")
-            except Exception as e:
-                logging.error(f"Error storing report {title} from {canonical}: {e}")
+        metadata = {"title": title, "url": canonical, "processed": False}
+        for key, value in (("published", published), ("author", author), ("canonical_url", canonical_url)):
+            if value:
+                metadata[key] = value
+        if not self.added_ids.claim(report_id):
+            return
+        self.writer.add(report_id, content, metadata)
+        self.lexical_index.add(report_id, f"{title}\n{content}")
+        self.ledger.record(report_id, "fetched")
+        stream = self.stream
+        if stream is not None:
+            # Blocks while the queue is full, so the crawl can't run ahead of the consumers
+            stream.put(report_id)
+
+    def open_stream(self, maxsize=8):
+        """
+        Streaming mode: every newly stored report ID is put on the returned bounded queue,
+        so consumers can process reports while the crawl is still running.
+        A full queue blocks the storing crawler thread (backpressure). end_stream() puts the None end marker.
+        """
+        self.stream = queue.Queue(maxsize=maxsize)
+        return self.stream
+
+    def end_stream(self):
+        """
+        Closes the stream once the crawl is over; consumers stop at the None marker.
+        """
+        stream, self.stream = self.stream, None
+        if stream is not None:
+            stream.put(None)
                 
-    def process_article_link(self, link, base_url):
-        """
-        Process a single article link:
-        - Constructs the full URL.
-        - Uses the link text as the initial title.
-        - If the link text is generic (e.g. too short, or starts with 'comment'/'read more'),
-            fetch a better title from the article page.
-        - If the link qualifies as an article and is new, fetch its content and store it.
+    def has_generic_title(self, link_title: str) -> bool:
+        """
+        True if the link text is too short or starts with 'comment'/'read more'.
+        """
+        return len(link_title) < 15 or bool(re.search(r"^(comment|read more)", link_title, re.IGNORECASE))
+
+    def triage_links(self, links, base_url):
+        """
+        Triage all anchors of a page ((href, text) pairs) in one pass, before any network work:
+        - Canonicalizes and dedups them (keeping the longest link text per URL,
+            so 'Comments' or 'Read more' anchors don't replace a real headline).
+        - Drops links that are not articles or that are already stored.
+        Returns a dict {canonical_url: link_title} of new article links.
+        The per-step drop counts are accumulated in self.triage_stats.
+        """
+        counts = Counter(links=len(links))
+        unique = {}
+        for href, link_title in links:
+            canonical = self.canonicalize_url(urljoin(base_url, href))
+            if canonical in unique:
+                counts["dropped_duplicate"] += 1
+                if len(link_title) > len(unique[canonical]):
+                    unique[canonical] = link_title
+                continue
+            unique[canonical] = link_title
+        articles = {}
+        for canonical, link_title in unique.items():
+            if self.is_article_link(canonical):
+                articles[self.generate_id(canonical)] = canonical
+            else:
+                counts["dropped_not_article"] += 1
+        if self.watermarks and articles:
+            newest = max((self.article_date(url), report_id) for report_id, url in articles.items())
+            site = urlparse(base_url).netloc
+            with self.stats_lock:
+                if newest > self.crawl_newest.get(site, ("", "")):
+                    self.crawl_newest[site] = newest
+        new_ids = self.added_ids.filter_new(list(articles))
+        counts["dropped_known"] += len(articles) - len(new_ids)
+        candidates = {articles[report_id]: unique[articles[report_id]] for report_id in new_ids}
+        self.ledger.register(new_ids, "discovered")
+        counts["queued"] = len(candidates)
+        with self.stats_lock:
+            self.triage_stats.update(counts)
+        logging.info(f"Link triage for {base_url}: {dict(counts)}")
+        return candidates
+
+    def store_article(self, url, link_title, article):
+        """
+        Stores a fetched article record.
+        The link text is the title unless it is generic, then the page's own title is used.
         Returns True if the article was stored.
         """
-        full_link = urljoin(base_url, link.get("href"))
-        link_title = link.get_text(strip=True)
+        article = article or {}
         title = link_title
-        # If the link text is generic, attempt to fetch a better title
-        if len(link_title) < 15 or re.search(r"^(comment|read more)", link_title, re.IGNORECASE):
-            fetched_title = self.fetch_article_title(full_link)
-            if fetched_title:
-                title = fetched_title
+        if self.has_generic_title(link_title) and article.get("title"):
+            title = article["title"]
+        if not title:
+            return False
+        self.store_report(
+            title, url, article.get("content") or title,
+            published=article.get("published", ""),
+            author=article.get("author", ""),
+            canonical_url=article.get("canonical_url", ""),
+        )
+        return True
+
+    def process_article(self, url, link_title):
+        """
+        Fetch (once) and store a triaged article link.
+        Returns True if the article was stored.
+        """
         try:
-            if title and self.is_article_link(full_link) and self.is_new_report(full_link):
-                content = self.fetch_article_content(full_link) or title
-                self.store_report(title, full_link, content)
-                return True
+            return self.store_article(url, link_title, self.fetch_article(url))
         except Exception as e:
-            logging.error(f"Error processing link {full_link}: {e}")
+            logging.error(f"Error processing link {url}: {e}")
         return False
-    
-    def scrape_page_and_get_next(self, url):
+
+    def scrape_page_and_get_next(self, url, predicted=False):
         """
         Scrapes a page:
-        - Processes article links concurrently.
+        - Triages the page's links, then fetches only new article links concurrently.
         - Dynamically extracts the next page link.
+        predicted: the URL was guessed from the /page/N/ pattern, not linked (see listing_page_failed).
         Returns the next page URL (or None if not found).
         """
         if not self.allowed_by_robots(url):
@@ -216,16 +551,24 @@ class CyberThreatCrawler:
         try:
             logging.info(f"Scraping: {url}")
             headers, proxies = self.get_headers_and_proxy()
-            response = self.session.get(url, headers=headers, proxies=proxies,
-                                timeout=(self.connect_timeout, self.read_timeout))
+            headers.update(self.conditional_headers(url))
+            response = self.polite_get(url, headers=headers, proxies=proxies)
+            if self.page_unchanged(url, response.status_code, response.headers):
+                # An unchanged listing page has no new articles: incremental crawls of a site
+                # that was completely crawled before stop here
+                if self.incremental and self.has_watermark(url):
+                    return None
+                return self.validators.next_page(self.canonicalize_url(url))
             if response.status_code != 200:
                 logging.warning(f"Skipping {url} (HTTP {response.status_code})")
+                self.listing_page_failed(url, predicted)
                 return None
-            soup = BeautifulSoup(response.text, "html.parser")
+            links = self.parser.parse_links(response.text)
             posts_found = 0
-            links = soup.find_all("a", href=True)
+            candidates = self.triage_links(links, url)
+            continue_pagination = self.should_continue_pagination(url, candidates)
             with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                futures = [executor.submit(self.process_article_link, link, url) for link in links]
+                futures = [executor.submit(self.process_article, link, title) for link, title in candidates.items()]
                 for future in concurrent.futures.as_completed(futures):
                     try:
                         if future.result():
@@ -233,64 +576,485 @@ class CyberThreatCrawler:
                     except Exception as e:
                         logging.error(f"Error in processing future: {e}")
             logging.info(f"Found {posts_found} posts on page: {url}")
-            # Dynamically extract the next page link using candidate texts
-            candidate_texts = re.compile(r"(next|older posts|›)", re.IGNORECASE)
-            current_domain = urlparse(url).netloc
-            next_page = None
-            for link in soup.find_all("a", text=candidate_texts):
-                href = link.get("href")
-                if href:
-                    potential = urljoin(url, href)
-                    if urlparse(potential).netloc == current_domain and "/page/" in potential:
-                        next_page = potential
-                        break
+            next_page = self.find_next_page(links, url)
             if next_page:
                 logging.info(f"Next page found: {next_page}")
             else:
                 logging.info("No next page found.")
-            return next_page
+            self.record_validators(url, response.headers, next_page)
+            return next_page if continue_pagination else None
         except Exception as e:
             logging.error(f"Error scraping {url}: {e}")
+            self.listing_page_failed(url, predicted)
             return None
-        
+
+    def conditional_headers(self, url: str) -> dict:
+        if not self.validators:
+            return {}
+        return self.validators.conditional_headers(self.canonicalize_url(url))
+
+    def page_unchanged(self, url: str, status: int, headers) -> bool:
+        """
+        True if a listing page was not modified since it was last processed (304 or same validators).
+        The caller then skips parsing and article storage and reuses the recorded next page.
+        """
+        if not self.validators or not self.validators.is_unchanged(self.canonicalize_url(url), status, headers):
+            return False
+        logging.info(f"Not modified since last crawl: {url}")
+        return True
+
+    def record_validators(self, url: str, headers, next_page):
+        if self.validators:
+            self.validators.update(self.canonicalize_url(url), headers, next_page)
+
+    def predict_pages(self, next_page, count):
+        """
+        If next_page follows the /page/N/ pattern, returns it and the following count - 1 page URLs.
+        Returns an empty list if there is no pattern to predict from.
+        """
+        match = re.search(r"/page/(\d+)", next_page)
+        if not match or count < 1:
+            return []
+        number = int(match.group(1))
+        return [next_page[:match.start(1)] + str(number + i) + next_page[match.end(1):] for i in range(count)]
+
+    def next_window(self, next_page, scraped_pages, max_pages):
+        """
+        Listing pages to fetch concurrently next: a predicted /page/N/ window, or just next_page.
+        Incremental crawls of an already crawled site follow one page at a time: a steady-state run
+        usually stops after the first page or two, so prefetched pages would be wasted fetches.
+        """
+        remaining = max_pages - len(scraped_pages)
+        if self.incremental and self.has_watermark(next_page):
+            return [next_page] if next_page not in scraped_pages and remaining > 0 else []
+        window = self.predict_pages(next_page, min(self.pagination_window, remaining)) or [next_page]
+        return [page for page in window if page not in scraped_pages][:remaining]
+
+    def follow_window(self, window, results):
+        """
+        Verifies a concurrently fetched window against the next links the pages actually reported.
+        Returns the page to continue from: the link after the window if every prediction held,
+        the reported link where the pattern broke (falling back to link-following), or None at the end.
+        """
+        with self.stats_lock:
+            failed = self.failed_predictions & set(window)
+            self.failed_predictions -= failed
+        for i, page in enumerate(window):
+            found = results.get(page)
+            if found is None:
+                # A failed prediction the previous page did link to is a real gap in the crawl
+                if page in failed and i and results.get(window[i - 1]) == page:
+                    self.crawl_failed(page)
+                return None
+            if i + 1 == len(window):
+                return found
+            if found != window[i + 1]:
+                logging.info(f"Pagination pattern broke after {page}, following {found}")
+                return found
+        return None
+
     def scrape_all_pages_dynamic(self, start_url=None, max_pages=None):
         """
         Dynamically scrapes pages by following 'next page' links.
-        Processes pages concurrently in batches until no new page is found or max_pages is reached.
+        Once the next link follows a /page/N/ pattern, a window of upcoming pages is fetched
+        concurrently, until no new page is found or max_pages is reached.
+        In async mode the whole crawl runs on a single event loop instead.
         """
+        if self.use_async:
+            return self.run_async(self.scrape_all_pages_async(start_url, max_pages))
         max_pages = max_pages if max_pages is not None else self.max_pages
-        pages_to_scrape = [start_url] if max_pages is not None else [self.start_url]
+        next_page = start_url or self.start_url
         scraped_pages = set()
+        self.begin_crawl(next_page)
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            while pages_to_scrape and len(scraped_pages) < max_pages:
-                futures = {executor.submit(self.scrape_page_and_get_next, url): url for url in pages_to_scrape if url not in scraped_pages}
-                pages_to_scrape = []
+            while next_page and len(scraped_pages) < max_pages:
+                window = self.next_window(next_page, scraped_pages, max_pages)
+                if not window:
+                    break
+                futures = {executor.submit(self.scrape_page_and_get_next, url, url != next_page): url
+                           for url in window}
+                results = {}
                 for future in concurrent.futures.as_completed(futures):
                     current_url = futures[future]
                     scraped_pages.add(current_url)
                     try:
-                        next_page = future.result()
-                        if next_page and next_page not in scraped_pages:
-                            pages_to_scrape.append(next_page)
+                        results[current_url] = future.result()
                     except Exception as e:
                         logging.error(f"Error scraping page {current_url}: {e}")
+                        self.crawl_failed(current_url)
+                next_page = self.follow_window(window, results)
+        self.writer.flush()
+        self.end_crawl(start_url or self.start_url)
         logging.info(f"Finished dynamic pagination scraping of {len(scraped_pages)} pages.")
-        
+        logging.info(f"Link triage totals: {dict(self.triage_stats)}")
+        if self.validators:
+            logging.info(f"Listing page revalidation: {self.validators.stats()}")
+
+    def scrape_sites(self, start_urls, max_pages=None):
+        """
+        Scrapes several blogs.
+        In async mode all sites share one event loop and the same in-flight request budget,
+        otherwise they are scraped one after the other.
+        """
+        if self.use_async:
+            return self.run_async(self.scrape_sites_async(start_urls, max_pages))
+        for start_url in start_urls:
+            self.scrape_all_pages_dynamic(start_url, max_pages)
+
+    def run_async(self, coro):
+        """
+        Runs a coroutine to completion from synchronous code.
+        If an event loop is already running in this thread (e.g. inside a Flow step),
+        the coroutine gets its own loop in a helper thread.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+
+    def create_async_session(self):
+        """
+        Creates the aiohttp session used by the async mode.
+        The connector pool and the semaphore both cap in-flight requests at max_concurrency,
+        the scheduler additionally caps them per host.
+        Note: requests_cache only applies to the threaded mode.
+        """
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.scheduler.reset_async()
+        timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        return aiohttp.ClientSession(timeout=timeout, connector=connector)
+
+    async def get_robot_parser_async(self, url: str):
+        parsed = urlparse(url)
+        base_url = f"{parsed.scheme}://{parsed.netloc}"
+        if base_url not in self.robot_parsers:
+            # robots.txt is read once per host with urllib, keep it off the event loop
+            return await asyncio.to_thread(self.get_robot_parser, url)
+        return self.robot_parsers.get(base_url)
+
+    async def allowed_by_robots_async(self, url: str) -> bool:
+        await self.get_robot_parser_async(url)
+        return self.allowed_by_robots(url)
+
+    async def fetch_response_async(self, session, url: str, extra_headers=None, retries=None, backoff_factor=None):
+        """
+        Async GET with the same retry/backoff policy as the threaded mode.
+        Returns (status, headers, body); body is None unless the status is 200.
+        Returns None after all retries failed.
+        """
+        retries = retries if retries is not None else self.retries
+        backoff_factor = backoff_factor if backoff_factor is not None else self.backoff_factor
+        await self.get_robot_parser_async(url)
+        attempt = 0
+        while attempt < retries:
+            try:
+                headers, proxies = self.get_headers_and_proxy()
+                headers.update(extra_headers or {})
+                proxy = proxies["http"] if proxies else None
+                # Host slot first: requests waiting for their host's rate budget don't hold global slots
+                async with self.scheduler.slot_async(url), self.semaphore:
+                    async with session.get(url, headers=headers, proxy=proxy) as response:
+                        body = await response.text() if response.status == 200 else None
+                        return response.status, response.headers, body
+            except Exception as e:
+                logging.error(f"Exception fetching {url}: {e}")
+                attempt += 1
+                sleep_time = backoff_factor ** attempt
+                logging.info(f"Retrying {url} in {sleep_time} seconds (attempt {attempt}/{retries})...")
+                await asyncio.sleep(sleep_time)
+        return None
+
+    async def fetch_html_async(self, session, url: str, retries=None, backoff_factor=None):
+        """
+        Returns the response body, or None on a non-200 status or after all retries failed.
+        """
+        result = await self.fetch_response_async(session, url, retries=retries, backoff_factor=backoff_factor)
+        if result is None:
+            return None
+        status, _, body = result
+        if status != 200:
+            logging.warning(f"Error fetching {url}: HTTP {status}")
+        return body
+
+    async def process_article_async(self, session, url, link_title):
+        """
+        Async counterpart of process_article.
+        Parsing and storing run in worker threads so the event loop keeps serving requests.
+        Returns True if the article was stored.
+        """
+        try:
+            article = None
+            if await self.allowed_by_robots_async(url):
+                html = await self.fetch_html_async(session, url)
+                if html:
+                    article = await asyncio.to_thread(self.extract_article, html, url)
+            else:
+                logging.info(f"Blocked by robots.txt: {url}")
+            return await asyncio.to_thread(self.store_article, url, link_title, article)
+        except Exception as e:
+            logging.error(f"Error processing link {url}: {e}")
+        return False
+
+    async def scrape_page_and_get_next_async(self, session, url, predicted=False):
+        """
+        Async counterpart of scrape_page_and_get_next.
+        New article links of the page are processed as tasks on the shared event loop.
+        Returns the next page URL (or None if not found).
+        """
+        if not await self.allowed_by_robots_async(url):
+            logging.info(f"Disallowed by robots.txt: {url}")
+            return None
+        try:
+            logging.info(f"Scraping: {url}")
+            conditional = await asyncio.to_thread(self.conditional_headers, url)
+            result = await self.fetch_response_async(session, url, conditional)
+            if result is None:
+                logging.warning(f"Skipping {url}")
+                self.listing_page_failed(url, predicted)
+                return None
+            status, headers, html = result
+            # Validator, known-ID and ledger lookups are SQLite / Chroma I/O: kept off the event loop
+            if await asyncio.to_thread(self.page_unchanged, url, status, headers):
+                # An unchanged listing page has no new articles: incremental crawls of a site
+                # that was completely crawled before stop here
+                if self.incremental and self.has_watermark(url):
+                    return None
+                return await asyncio.to_thread(self.validators.next_page, self.canonicalize_url(url))
+            if status != 200:
+                logging.warning(f"Skipping {url} (HTTP {status})")
+                self.listing_page_failed(url, predicted)
+                return None
+            links = await asyncio.to_thread(self.parser.parse_links, html)
+            candidates = await asyncio.to_thread(self.triage_links, links, url)
+            continue_pagination = self.should_continue_pagination(url, candidates)
+            results = await asyncio.gather(
+                *(self.process_article_async(session, link, title) for link, title in candidates.items()),
+                return_exceptions=True,
+            )
+            posts_found = sum(1 for result in results if result is True)
+            logging.info(f"Found {posts_found} posts on page: {url}")
+            next_page = self.find_next_page(links, url)
+            if next_page:
+                logging.info(f"Next page found: {next_page}")
+            else:
+                logging.info("No next page found.")
+            await asyncio.to_thread(self.record_validators, url, headers, next_page)
+            return next_page if continue_pagination else None
+        except Exception as e:
+            logging.error(f"Error scraping {url}: {e}")
+            self.listing_page_failed(url, predicted)
+            return None
+
+    async def crawl_site_async(self, session, start_url, max_pages):
+        scraped_pages = set()
+        next_page = start_url
+        await asyncio.to_thread(self.begin_crawl, start_url)
+        while next_page and len(scraped_pages) < max_pages:
+            window = self.next_window(next_page, scraped_pages, max_pages)
+            if not window:
+                break
+            scraped_pages.update(window)
+            found = await asyncio.gather(
+                *(self.scrape_page_and_get_next_async(session, url, url != next_page) for url in window),
+                return_exceptions=True,
+            )
+            results = {url: page for url, page in zip(window, found) if isinstance(page, str)}
+            for url, page in zip(window, found):
+                if isinstance(page, BaseException):
+                    self.crawl_failed(url)
+            next_page = self.follow_window(window, results)
+        await asyncio.to_thread(self.end_crawl, start_url)
+        logging.info(f"Finished async pagination scraping of {len(scraped_pages)} pages from {start_url}.")
+        return scraped_pages
+
+    async def scrape_all_pages_async(self, start_url=None, max_pages=None):
+        """
+        Async counterpart of scrape_all_pages_dynamic.
+        """
+        return await self.scrape_sites_async([start_url or self.start_url], max_pages)
+
+    async def scrape_sites_async(self, start_urls, max_pages=None):
+        """
+        Crawls every site concurrently on one event loop with one shared session.
+        """
+        max_pages = max_pages if max_pages is not None else self.max_pages
+        async with self.create_async_session() as session:
+            await asyncio.gather(
+                *(self.crawl_site_async(session, url, max_pages) for url in start_urls),
+                return_exceptions=True,
+            )
+        await asyncio.to_thread(self.writer.flush)
+        logging.info(f"Per-host request stats: {self.scheduler.stats()}")
+        if self.validators:
+            logging.info(f"Listing page revalidation: {self.validators.stats()}")
+        logging.info(f"Link triage totals: {dict(self.triage_stats)}")
+
+    def iter_articles(self, where=None, page_size=100, include_content=True, limit=None,
+                      order_by=None, descending=False):
+        """
+        Streams articles from the collection page by page.
+        Yields dictionaries with article id, content (None if include_content is False), and metadata.
+
+        :param where: Chroma metadata filter, e.g. {"processed": False}.
+        :param page_size: Number of articles fetched per collection.get call.
+        :param include_content: Set to False to skip loading document bodies.
+        :param limit: Stop after this many articles.
+        :param order_by: Metadata key to sort by (e.g. "published"). Sorting needs the IDs and
+            metadata of all matching articles first; bodies are still only loaded page by page.
+        :param descending: Sort order for order_by.
+        """
+        self.writer.flush()
+        include = ["metadatas", "documents"] if include_content else ["metadatas"]
+        if order_by:
+            yield from self.iter_articles_ordered(where, page_size, include, limit, order_by, descending)
+            return
+        offset = 0
+        yielded = 0
+        while limit is None or yielded < limit:
+            size = page_size if limit is None else min(page_size, limit - yielded)
+            result = self.collection.get(where=where, include=include, limit=size, offset=offset)
+            ids = result.get("ids") or []
+            for article in self.articles_from_result(result):
+                yield article
+            yielded += len(ids)
+            offset += len(ids)
+            if len(ids) < size:
+                return
+
+    def iter_articles_ordered(self, where, page_size, include, limit, order_by, descending):
+        metadata = {}
+        for article in self.iter_articles(where, page_size, include_content=False):
+            metadata[article["id"]] = article["metadata"]
+        ordered = sorted(metadata, key=lambda article_id: str(metadata[article_id].get(order_by, "")),
+                         reverse=descending)
+        if limit is not None:
+            ordered = ordered[:limit]
+        for i in range(0, len(ordered), page_size):
+            page = ordered[i:i + page_size]
+            if "documents" not in include:
+                for article_id in page:
+                    yield {"id": article_id, "content": None, "metadata": metadata[article_id]}
+                continue
+            by_id = {article["id"]: article for article in self.articles_from_result(
+                self.collection.get(ids=page, include=include))}
+            for article_id in page:
+                if article_id in by_id:
+                    yield by_id[article_id]
+
+    def articles_from_result(self, result):
+        documents = result.get("documents")
+        for idx, article_id in enumerate(result.get("ids") or []):
+            yield {
+                "id": article_id,
+                "content": documents[idx] if documents else None,
+                "metadata": result["metadatas"][idx]
+            }
+
+    def iter_unprocessed_articles(self, **kwargs):
+        """
+        Streams articles where metadata 'processed' is False, see iter_articles for the options.
+        """
+        return self.iter_articles(where={"processed": False}, **kwargs)
+
+    def iter_processed_articles(self, **kwargs):
+        """
+        Streams articles where metadata 'processed' is True, see iter_articles for the options.
+        """
+        return self.iter_articles(where={"processed": True}, **kwargs)
+
+    def sync_ledger(self, page_size=500):
+        """
+        Adds articles stored before the ledger existed: processed ones as 'summarized',
+        the others as 'fetched'. Reads IDs and metadata only, once per ledger database
+        (every article stored since is recorded by store_report).
+        """
+        if self.ledger.migrated("sync_ledger"):
+            return
+        for processed, state in ((True, "summarized"), (False, "fetched")):
+            ids = [article["id"] for article in self.iter_articles(
+                where={"processed": processed}, page_size=page_size, include_content=False)]
+            self.ledger.register(ids, state)
+        self.ledger.mark_migrated("sync_ledger")
+
+    def sync_lexical_index(self, page_size=100):
+        """
+        Adds articles stored before the keyword index existed to it, one page at a time.
+        Runs once per index file; store_report indexes every article stored since.
+        """
+        if self.lexical_index.backfilled():
+            return 0
+        self.writer.flush()
+        ids = self.lexical_index.missing(article["id"] for article in self.iter_articles(
+            page_size=page_size * 5, include_content=False))
+        for i in range(0, len(ids), page_size):
+            articles = self.articles_from_result(self.collection.get(ids=ids[i:i + page_size],
+                                                                     include=["metadatas", "documents"]))
+            self.lexical_index.add_many(
+                (article["id"], f"{article['metadata'].get('title', '')}\n{article['content']}") for article in articles
+            )
+        self.lexical_index.mark_backfilled()
+        return len(ids)
+
+    def get_articles(self, article_ids):
+        """
+        Returns the stored articles with the given IDs (buffered reports are written first).
+        """
+        self.writer.flush()
+        return list(self.articles_from_result(self.collection.get(ids=list(article_ids),
+                                                                  include=["metadatas", "documents"])))
+
+    def iter_actionable_pages(self, limit=None, page_size=100):
+        """
+        Streams the articles the ledger still has work for (new, interrupted or retryable),
+        in the ledger's resume order, as lists of at most page_size articles.
+        Only one page of documents is loaded at a time; decided articles are never returned.
+        """
+        self.writer.flush()
+        ids = self.ledger.actionable(limit)
+        for i in range(0, len(ids), page_size):
+            page = ids[i:i + page_size]
+            by_id = {article["id"]: article for article in self.articles_from_result(
+                self.collection.get(ids=page, include=["metadatas", "documents"]))}
+            yield [by_id[article_id] for article_id in page if article_id in by_id]
+
+    def query_passages(self, query: str, n_results=5, report_id=None):
+        """
+        Returns the passages most similar to the query, optionally within one report.
+        Each result is a dictionary with report id, chunk number, text, distance and the parent's metadata.
+        """
+        self.writer.flush()
+        where = {"report_id": report_id} if report_id else None
+        result = self.chunk_collection.query(query_texts=[query], n_results=n_results, where=where,
+                                             include=["documents", "metadatas", "distances"])
+        chunks = [
+            {"report_id": metadata["report_id"], "chunk": metadata["chunk"], "text": document, "distance": distance}
+            for document, metadata, distance in zip(result["documents"][0], result["metadatas"][0], result["distances"][0])
+        ]
+        parent_ids = list(dict.fromkeys(chunk["report_id"] for chunk in chunks))
+        parents = self.collection.get(ids=parent_ids, include=["metadatas"]) if parent_ids else {"ids": []}
+        metadata_by_id = dict(zip(parents["ids"], parents.get("metadatas") or []))
+        for chunk in chunks:
+            chunk["metadata"] = metadata_by_id.get(chunk["report_id"], {})
+        return chunks
+
+    def report_excerpt(self, report_id: str, query: str, n_chunks=3) -> str:
+        """
+        The n_chunks passages of a report most relevant to the query, in article order,
+        for prompts that don't need the whole body.
+        """
+        passages = sorted(self.query_passages(query, n_results=n_chunks, report_id=report_id),
+                          key=lambda passage: passage["chunk"])
+        return "\n...\n".join(passage["text"] for passage in passages)
+
     def get_unprocessed_articles(self):
         """
         Retrieves all articles from the collection where metadata 'processed' is False.
         Returns a list of dictionaries with article id, content, and metadata.
         """
-        result = self.collection.get(where={"processed": False})
-        articles = []
-        if result and "ids" in result:
-            for idx, article_id in enumerate(result["ids"]):
-                articles.append({
-                    "id": article_id,
-                    "content": result["documents"][idx],
-                    "metadata": result["metadatas"][idx]
-                })
-        return articles
+        return list(self.iter_unprocessed_articles())
     
     def mark_article_as_processed(self, article_id):
         """
@@ -298,40 +1062,36 @@ class CyberThreatCrawler:
         
         :param article_id: The ID of the article to update.
         """
-        # Retrieve the current document
-        result = self.collection.get(ids=[article_id])
+        self.mark_articles_as_processed([article_id])
 
-        if not result or "ids" not in result or not result["ids"]:
-            print(f"Article {article_id} not found.")
-            return
-
-        # Extract existing content and metadata
-        idx = result["ids"].index(article_id)
-        updated_metadata = result["metadatas"][idx]
-        updated_metadata["processed"] = True
+    def mark_articles_as_processed(self, article_ids, processed=True):
+        """
+        Sets the 'processed' field of many articles in one metadata-only update.
+        No document is re-sent, so nothing is re-embedded.
 
-        # Re-insert the document with updated metadata
-        self.collection.upsert(
-            ids=[article_id],
-            documents=[result["documents"][idx]],
-            metadatas=[updated_metadata]
-        )
-        print(f"✅ Article {article_id} marked as processed.")
+        :param article_ids: The IDs of the articles to update.
+        :param processed: The new value of the 'processed' field.
+        :return: The IDs that were updated (unknown IDs are skipped).
+        """
+        article_ids = list(dict.fromkeys(article_ids))
+        if not article_ids:
+            return []
+        self.writer.flush()
+        found = set(self.collection.get(ids=article_ids, include=[]).get("ids") or [])
+        for article_id in article_ids:
+            if article_id not in found:
+                print(f"Article {article_id} not found.")
+        updated = [article_id for article_id in article_ids if article_id in found]
+        if updated:
+            # Chroma merges the given keys into the stored metadata
+            self.collection.update(ids=updated, metadatas=[{"processed": processed} for _ in updated])
+            mark_written()
+            print(f"✅ {len(updated)} article(s) marked as {'processed' if processed else 'unprocessed'}.")
+        return updated
 
     def get_processed_articles(self):
         """
         Retrieves all articles where metadata 'processed' is True.
         Returns a list of dictionaries with article id, content, and metadata.
         """
-        result = self.collection.get(where={"processed": True})  # Query for processed=True
-
-        articles = []
-        if result and "ids" in result:
-            for idx, article_id in enumerate(result["ids"]):
-                articles.append({
-                    "id": article_id,
-                    "content": result["documents"][idx],
-                    "metadata": result["metadatas"][idx]
-                })
-
-        return articles  # Return the list of processed articles
+        return list(self.iter_processed_articles())
@@ -0,0 +1,150 @@
+"""
+HTML parser backends for the crawler.
+
+Every backend exposes the two extractions the crawler needs:
+- parse_links(html): (href, text) of every <a href> on a listing page.
+- parse_article(html, url): title, body paragraphs and metadata of an article page.
+
+Backends:
+- "selectolax": lexbor-based C parser, fastest (pip install selectolax).
+- "lxml": BeautifulSoup on lxml (pip install lxml).
+- "html.parser": BeautifulSoup on the pure-Python stdlib parser, always available.
+The BeautifulSoup backends only build the tags they need (SoupStrainer partial parsing),
+and parse the whole page only when the strained tags miss the body or the author.
+"auto" picks the fastest installed backend.
+"""
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+
+LINK_STRAINER = SoupStrainer("a", href=True)
+# Tags the article extraction reads; the body is taken from <article> (whole subtree kept)
+ARTICLE_STRAINER = SoupStrainer(["title", "meta", "link", "time", "article"])
+
+
+def empty_article() -> dict:
+    return {"title": "", "content": "", "published": "", "author": "", "canonical_url": ""}
+
+
+class SoupParser:
+    """
+    BeautifulSoup backend with partial parsing.
+    """
+    def __init__(self, features="html.parser"):
+        self.name = features
+        self.features = features
+
+    def parse_links(self, html: str):
+        soup = BeautifulSoup(html, self.features, parse_only=LINK_STRAINER)
+        return [(link.get("href"), link.get_text(strip=True)) for link in soup.find_all("a", href=True)]
+
+    def meta(self, soup, *names) -> str:
+        for name in names:
+            tag = soup.find("meta", attrs={"property": name}) or soup.find("meta", attrs={"name": name})
+            if tag and tag.get("content"):
+                return tag["content"].strip()
+        return ""
+
+    def parse_article(self, html: str, url: str) -> dict:
+        soup = BeautifulSoup(html, self.features, parse_only=ARTICLE_STRAINER)
+        full = False
+        container = soup.find("article")
+        if container is None:
+            # Pages without <article>: fall back to a full parse for the blog-content div
+            soup, full = BeautifulSoup(html, self.features), True
+            container = soup.find("div", class_="blog-content")
+        article = empty_article()
+        article["title"] = (soup.title.get_text(strip=True) if soup.title else "") or self.meta(soup, "og:title")
+        if container is not None:
+            article["content"] = "\n".join(p.get_text(strip=True) for p in container.find_all("p"))
+        article["published"] = self.meta(soup, "article:published_time", "og:published_time", "date")
+        if not article["published"]:
+            time_tag = soup.find("time", datetime=True)
+            article["published"] = time_tag["datetime"].strip() if time_tag else ""
+        article["author"] = self.meta(soup, "author", "article:author")
+        if not article["author"]:
+            # Bylines are often outside <article>, which the strainer drops: search the whole page
+            # (in document order, as selectolax does)
+            if not full:
+                soup, full = BeautifulSoup(html, self.features), True
+            author_tag = soup.find("a", rel="author") or soup.find(class_="author")
+            article["author"] = author_tag.get_text(strip=True) if author_tag else ""
+        canonical_tag = soup.find("link", rel="canonical", href=True)
+        if canonical_tag:
+            article["canonical_url"] = urljoin(url, canonical_tag["href"])
+        return article
+
+
+class LexborParser:
+    """
+    selectolax (lexbor) backend, CSS selectors over a C DOM.
+    """
+    name = "selectolax"
+
+    def parse_links(self, html: str):
+        tree = LexborHTMLParser(html)
+        return [(node.attributes.get("href"), node.text(strip=True)) for node in tree.css("a[href]")]
+
+    def meta(self, tree, *names) -> str:
+        for name in names:
+            node = tree.css_first(f'meta[property="{name}"]') or tree.css_first(f'meta[name="{name}"]')
+            if node and node.attributes.get("content"):
+                return node.attributes["content"].strip()
+        return ""
+
+    def parse_article(self, html: str, url: str) -> dict:
+        tree = LexborHTMLParser(html)
+        article = empty_article()
+        title = tree.css_first("title")
+        article["title"] = (title.text(strip=True) if title else "") or self.meta(tree, "og:title")
+        container = tree.css_first("article") or tree.css_first("div.blog-content")
+        if container is not None:
+            article["content"] = "\n".join(p.text(strip=True) for p in container.css("p"))
+        article["published"] = self.meta(tree, "article:published_time", "og:published_time", "date")
+        if not article["published"]:
+            time_tag = tree.css_first("time[datetime]")
+            article["published"] = time_tag.attributes["datetime"].strip() if time_tag else ""
+        article["author"] = self.meta(tree, "author", "article:author")
+        if not article["author"]:
+            author_tag = tree.css_first('a[rel~="author"]') or tree.css_first(".author")
+            article["author"] = author_tag.text(strip=True) if author_tag else ""
+        canonical_tag = tree.css_first('link[rel="canonical"][href]')
+        if canonical_tag:
+            article["canonical_url"] = urljoin(url, canonical_tag.attributes["href"])
+        return article
+
+
+def available_parsers():
+    names = []
+    if LexborHTMLParser is not None:
+        names.append("selectolax")
+    if HAS_LXML:
+        names.append("lxml")
+    names.append("html.parser")
+    return names
+
+
+def get_parser(name="auto"):
+    """
+    Returns a parser backend by name ("auto", "selectolax", "lxml" or "html.parser").
+    Raises ValueError for unknown or uninstalled backends.
+    """
+    if name == "auto":
+        name = available_parsers()[0]
+    if name not in available_parsers():
+        raise ValueError(f"HTML parser backend '{name}' is not available, installed: {available_parsers()}")
+    if name == "selectolax":
+        return LexborParser()
+    return SoupParser(name)
@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+
+
+class KnownIds:
+    """
+    Membership index of the report IDs stored in a Chroma collection, without loading the collection.
+    - IDs added by this process are kept in a set (those are what crawler threads race on).
+    - Any other ID is looked up in Chroma by primary key, ID-only (include=[]), in batches.
+    - Positive lookups are remembered in a bounded LRU, so memory does not grow with the archive.
+    Startup cost is constant: nothing is read until a link has to be checked.
+    """
+    def __init__(self, collection, cache_size=50000, batch_size=500):
+        self.collection = collection
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.added = set()
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def remember(self, report_id):
+        self.cache[report_id] = True
+        self.cache.move_to_end(report_id)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def lookup(self, ids):
+        """
+        Returns the subset of ids present in the collection (one ID-only query per batch).
+        """
+        found = set()
+        for i in range(0, len(ids), self.batch_size):
+            result = self.collection.get(ids=ids[i:i + self.batch_size], include=[])
+            found.update(result.get("ids") or [])
+        return found
+
+    def filter_new(self, ids):
+        """
+        Returns the ids that are not stored yet, checking all unknown ones in batched queries.
+        """
+        with self.lock:
+            unknown = [report_id for report_id in ids if report_id not in self.added and report_id not in self.cache]
+        found = self.lookup(unknown) if unknown else set()
+        with self.lock:
+            for report_id in found:
+                self.remember(report_id)
+        return [report_id for report_id in unknown if report_id not in found]
+
+    def __contains__(self, report_id):
+        return not self.filter_new([report_id])
+
+    def add(self, report_id):
+        with self.lock:
+            self.added.add(report_id)
+
+    def claim(self, report_id) -> bool:
+        """
+        Marks report_id as added by this process; False if it already was (or is known stored).
+        Memory only: the Chroma check belongs to triage (filter_new), before the article is fetched.
+        """
+        with self.lock:
+            if report_id in self.added or report_id in self.cache:
+                return False
+            self.added.add(report_id)
+            return True
+
+    def discard(self, report_id):
+        with self.lock:
+            self.added.discard(report_id)
+            self.cache.pop(report_id, None)
@@ -0,0 +1,137 @@
+import atexit
+import json
+import logging
+import os
+import threading
+
+from cyberthreat_article_process.embeddings.chunker import chunk_text
+from cyberthreat_article_process.search.semantic_search import mark_written
+
+
+class ReportWriter:
+    """
+    Write-behind buffer for the reports collection.
+    - add() journals the report to a local JSONL file, then buffers it.
+    - The buffer is written with one collection.add per batch (one embedding call for the batch),
+      when it reaches batch_size or every flush_interval seconds.
+    - With a chunk_collection, every report is also split into overlapping passages stored
+      there with only a link to the parent (report_id, chunk); parent metadata stays in collection.
+    - Flushed reports are removed from the journal; reports still in the journal at startup
+      (crash between buffer and flush) are replayed, skipping those that reached Chroma.
+    """
+    def __init__(self, collection, journal_path="cache/report_journal.jsonl", batch_size=64, flush_interval=5.0,
+                 chunk_collection=None, chunk_words=200, chunk_overlap=40):
+        self.collection = collection
+        self.chunk_collection = chunk_collection
+        self.chunk_words = chunk_words
+        self.chunk_overlap = chunk_overlap
+        self.journal_path = journal_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        directory = os.path.dirname(journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.replay()
+        self.journal = open(journal_path, "a", encoding="utf-8")
+        self.flusher = threading.Thread(target=self.run, name="report-writer", daemon=True)
+        self.flusher.start()
+        atexit.register(self.close)
+
+    def replay(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding="utf-8") as file:
+            records = [json.loads(line) for line in file if line.strip()]
+        if records:
+            stored = set(self.collection.get(ids=[r["id"] for r in records], include=[]).get("ids") or [])
+            missing = {r["id"]: r for r in records if r["id"] not in stored}
+            logging.info(f"Replaying {len(missing)} journaled reports ({len(records) - len(missing)} already stored).")
+            self.write(list(missing.values()))
+            # Chunks are upserted with deterministic IDs, so re-chunking stored reports is harmless
+            self.write_chunks(records)
+        open(self.journal_path, "w").close()
+
+    def add(self, report_id: str, document: str, metadata: dict):
+        record = {"id": report_id, "document": document, "metadata": metadata}
+        with self.lock:
+            self.journal.write(json.dumps(record) + "\n")
+            self.journal.flush()
+            self.pending.append(record)
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def write(self, records):
+        """
+        Adds records in one call; if the batch is rejected, falls back to one add per record
+        so a single bad report does not drop the others.
+        """
+        if not records:
+            return
+        try:
+            self.collection.add(
+                ids=[r["id"] for r in records],
+                documents=[r["document"] for r in records],
+                metadatas=[r["metadata"] for r in records],
+            )
+            for record in records:
+                logging.info(f"Stored: {record['metadata'].get('title')} → {record['metadata'].get('url')}")
+        except Exception as e:
+            logging.warning(f"Batch insert of {len(records)} reports failed ({e}), retrying one by one.")
+            for record in records:
+                try:
+                    self.collection.add(ids=[record["id"]], documents=[record["document"]],
+                                        metadatas=[record["metadata"]])
+                except Exception as e:
+                    logging.error(f"Error storing report {record['metadata'].get('title')}: {e}")
+
+    def write_chunks(self, records):
+        if self.chunk_collection is None:
+            return
+        ids, documents, metadatas = [], [], []
+        for record in records:
+            for n, chunk in enumerate(chunk_text(record["document"], self.chunk_words, self.chunk_overlap)):
+                ids.append(f"{record['id']}:{n}")
+                documents.append(chunk)
+                metadatas.append({"report_id": record["id"], "chunk": n})
+        if not ids:
+            return
+        try:
+            self.chunk_collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+        except Exception as e:
+            logging.error(f"Error storing {len(ids)} chunks: {e}")
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, []
+            if not batch:
+                return
+            self.write(batch)
+            self.write_chunks(batch)
+            mark_written()
+            with self.lock:
+                # Keep only the reports buffered while the batch was being written
+                self.journal.seek(0)
+                self.journal.truncate()
+                for record in self.pending:
+                    self.journal.write(json.dumps(record) + "\n")
+                self.journal.flush()
+
+    def run(self):
+        while not self.stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error flushing reports: {e}")
+
+    def close(self):
+        if self.stop_event.is_set():
+            return
+        self.stop_event.set()
+        self.flush()
+        self.journal.close()
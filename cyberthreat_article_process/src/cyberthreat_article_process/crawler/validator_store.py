@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class ValidatorStore:
+    """
+    Persistent ETag / Last-Modified store for conditional GETs, keyed by canonical URL.
+    Along with the validators it keeps the next page link of a listing page,
+    so an unchanged page can be skipped without parsing while pagination continues.
+    """
+    def __init__(self, path="cache/validators.sqlite"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS validators ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, next_page TEXT, checked_at REAL)"
+        )
+        self.conn.commit()
+        self.not_modified = 0
+        self.modified = 0
+
+    def get(self, url: str):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, next_page FROM validators WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "next_page": row[2]}
+
+    def conditional_headers(self, url: str) -> dict:
+        """
+        Returns the If-None-Match / If-Modified-Since headers for a previously seen URL.
+        """
+        record = self.get(url)
+        headers = {}
+        if record and record["etag"]:
+            headers["If-None-Match"] = record["etag"]
+        if record and record["last_modified"]:
+            headers["If-Modified-Since"] = record["last_modified"]
+        return headers
+
+    def is_unchanged(self, url: str, status: int, headers) -> bool:
+        """
+        True on a 304, or when a (possibly locally cached) 200 carries the validators we already stored.
+        """
+        record = self.get(url)
+        unchanged = status == 304
+        if not unchanged and status == 200 and record:
+            etag = headers.get("ETag")
+            last_modified = headers.get("Last-Modified")
+            unchanged = bool(
+                (etag and etag == record["etag"])
+                or (not etag and last_modified and last_modified == record["last_modified"])
+            )
+        if unchanged:
+            self.not_modified += 1
+        else:
+            self.modified += 1
+        return unchanged
+
+    def next_page(self, url: str):
+        record = self.get(url)
+        return record["next_page"] if record else None
+
+    def update(self, url: str, headers, next_page=None):
+        """
+        Records the validators of a fully processed response.
+        Call it only after the page was handled, so an interrupted crawl revisits the page.
+        """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO validators (url, etag, last_modified, next_page, checked_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, next_page, time.time()),
+            )
+            self.conn.commit()
+
+    def stats(self):
+        return {"not_modified": self.not_modified, "modified": self.modified}
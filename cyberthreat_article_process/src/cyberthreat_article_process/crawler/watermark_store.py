@@ -0,0 +1,49 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class WatermarkStore:
+    """
+    Persistent per-site high-water mark: the newest article (by its /YYYY/MM/ URL date) and its ID
+    seen by the last complete crawl. A site with a mark was crawled completely before, so incremental
+    crawls stop paginating at the first listing page without new articles.
+    """
+    def __init__(self, path="cache/watermarks.sqlite"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks ("
+            "site TEXT PRIMARY KEY, newest_date TEXT, newest_id TEXT, updated_at REAL)"
+        )
+        self.conn.commit()
+
+    def get(self, site: str):
+        """
+        Returns {"newest_date": "YYYY/MM", "newest_id": ...} for the site, or None.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT newest_date, newest_id FROM watermarks WHERE site = ?", (site,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"newest_date": row[0], "newest_id": row[1]}
+
+    def advance(self, site: str, article_date: str, article_id: str):
+        """
+        Moves the site's mark forward if article_date ("YYYY/MM") is newer than the stored one.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT newest_date FROM watermarks WHERE site = ?", (site,)).fetchone()
+            if row and row[0] >= article_date:
+                return
+            self.conn.execute(
+                "INSERT OR REPLACE INTO watermarks (site, newest_date, newest_id, updated_at) VALUES (?, ?, ?, ?)",
+                (site, article_date, article_id, time.time()),
+            )
+            self.conn.commit()
@@ -0,0 +1,37 @@
+from crewai import Agent, Crew, Process, Task
+from crewai.project import CrewBase, agent, crew, task
+
+from cyberthreat_article_process.schema.models import BatchVerdicts
+
+@CrewBase
+class BatchReportEvaluation():
+	"""BatchReportEvaluation crew: IsReportWorthProcessing for many reports in one request"""
+
+	agents_config = 'config/agents.yaml'
+	tasks_config = 'config/tasks.yaml'
+
+	@agent
+	def batch_evaluator_agent(self) -> Agent:
+		return Agent(
+			config=self.agents_config['batch_evaluator_agent'],
+			verbose=True,
+			# llm=llm
+		)
+
+	@task
+	def batch_evaluation_task(self) -> Task:
+		return Task(
+			config=self.tasks_config['batch_evaluation_task'],
+			output_pydantic=BatchVerdicts
+		)
+
+	@crew
+	def crew(self) -> Crew:
+		"""Creates the BatchReportEvaluation crew"""
+		return Crew(
+			agents=self.agents, # Automatically created by the @agent decorator
+			tasks=self.tasks, # Automatically created by the @task decorator
+			process=Process.sequential,
+			verbose=True,
+			max_rpm=1,
+		)
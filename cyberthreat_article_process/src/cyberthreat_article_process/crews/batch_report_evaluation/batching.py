@@ -0,0 +1,34 @@
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (about 4 characters per token for English text), good enough to size batches.
+    """
+    return len(text) // 4 + 1
+
+
+def report_entry(key: str, report, excerpt_chars=1500, excerpt=None) -> str:
+    """
+    One report of a batch prompt: key, title, URL and an excerpt of at most excerpt_chars,
+    the given one (e.g. the report's most relevant passages) or else the beginning of the article.
+    """
+    metadata = report['metadata']
+    excerpt = " ".join((excerpt or report.get('content') or "")[:excerpt_chars].split())
+    return f"[{key}] {metadata.get('title', '')}\nURL: {metadata.get('url', '')}\nExcerpt: {excerpt}\n"
+
+
+def pack_batches(reports, token_budget=6000, max_batch_size=10, excerpt_chars=1500):
+    """
+    Packs reports into batches whose entries stay under token_budget (and max_batch_size reports).
+    A report larger than the budget gets a batch of its own.
+    Returns a list of batches, each a list of reports.
+    """
+    batches, batch, used = [], [], 0
+    for report in reports:
+        tokens = estimate_tokens(report_entry("R00", report, excerpt_chars))
+        if batch and (used + tokens > token_budget or len(batch) >= max_batch_size):
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(report)
+        used += tokens
+    if batch:
+        batches.append(batch)
+    return batches
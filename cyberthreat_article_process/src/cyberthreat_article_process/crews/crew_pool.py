@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class CrewPool:
+    """
+    Per-process pool of ready-to-run crews, so a report doesn't pay for reading the YAML configs
+    and building agents, tools and LLM clients again.
+    - The first acquire() of a crew class builds it once (CrewClass().crew()) as the template.
+    - acquire() hands out an idle instance; when all are busy (concurrent reports) it adds
+      a copy of the template (Crew.copy(), as kickoff_for_each does) instead of a new build.
+    - Instances return to the pool after the kickoff; only the kickoff inputs vary per report.
+    - All instances of a crew class share the template's max_rpm limiter (see share_rate_limit).
+    stats() reports builds, copies, reuses and the time spent constructing crews.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.templates = {}
+        self.idle = defaultdict(list)
+        self.metrics = defaultdict(lambda: {"built": 0, "copied": 0, "reused": 0, "construction_seconds": 0.0})
+
+    def template(self, crew_class):
+        with self.lock:
+            if crew_class not in self.templates:
+                started = time.perf_counter()
+                self.templates[crew_class] = crew_class().crew()
+                metrics = self.metrics[crew_class.__name__]
+                metrics["built"] += 1
+                metrics["construction_seconds"] += time.perf_counter() - started
+            return self.templates[crew_class]
+
+    def take(self, crew_class):
+        template = self.template(crew_class)
+        metrics = self.metrics[crew_class.__name__]
+        with self.lock:
+            if self.idle[crew_class]:
+                metrics["reused"] += 1
+                return self.idle[crew_class].pop()
+        started = time.perf_counter()
+        crew = template.copy()
+        self.share_rate_limit(template, crew)
+        with self.lock:
+            metrics["copied"] += 1
+            metrics["construction_seconds"] += time.perf_counter() - started
+        return crew
+
+    def share_rate_limit(self, template, crew):
+        """
+        Crew.copy() gives every copy its own max_rpm limiter, so N concurrent instances would make
+        N times max_rpm requests. The copy and its agents use the template's limiter instead:
+        all instances of a crew class stay under one max_rpm together.
+        """
+        limiter = getattr(template, "_rpm_controller", None)
+        if not crew.max_rpm or limiter is None:
+            return
+        crew._rpm_controller.stop_rpm_counter()
+        crew._rpm_controller = limiter
+        for agent in crew.agents:
+            agent._rpm_controller = limiter
+
+    def give_back(self, crew_class, crew):
+        with self.lock:
+            self.idle[crew_class].append(crew)
+
+    @contextmanager
+    def acquire(self, crew_class):
+        """
+        with crew_pool.acquire(ReportProcessing) as crew: crew.kickoff(inputs=...)
+        The instance is used by one report at a time.
+        """
+        crew = self.take(crew_class)
+        try:
+            yield crew
+        finally:
+            self.give_back(crew_class, crew)
+
+    def stats(self):
+        with self.lock:
+            return {
+                name: dict(metrics, idle=sum(len(crews) for crew_class, crews in self.idle.items()
+                                             if crew_class.__name__ == name))
+                for name, metrics in self.metrics.items()
+            }
+
+
+crew_pool = CrewPool()
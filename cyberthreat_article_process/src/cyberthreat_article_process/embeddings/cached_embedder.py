@@ -0,0 +1,120 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils import embedding_functions
+
+# Embedding model used by both collections; "sentence-transformers:<model>" selects a local CPU model
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "default")
+# Texts per model call for the cache misses (larger batches are faster on CPU, at the cost of memory)
+EMBEDDING_BATCH_SIZE = max(1, int(os.getenv("EMBEDDING_BATCH_SIZE", "32")))
+
+models = {}
+models_lock = threading.Lock()
+
+
+def load_model(name: str):
+    """
+    Returns the embedding model with the given name, loaded once per process.
+    - "default": Chroma's ONNX all-MiniLM-L6-v2 (what the collections used so far).
+    - "sentence-transformers:<model>": a local sentence-transformers model on CPU.
+    """
+    with models_lock:
+        if name not in models:
+            if name == "default":
+                models[name] = embedding_functions.DefaultEmbeddingFunction()
+            elif name.startswith("sentence-transformers:"):
+                models[name] = embedding_functions.SentenceTransformerEmbeddingFunction(
+                    model_name=name.split(":", 1)[1], device="cpu"
+                )
+            else:
+                raise ValueError(f"Unknown embedding model '{name}'.")
+        return models[name]
+
+
+class CachedEmbeddingFunction(EmbeddingFunction):
+    """
+    Chroma embedding function that caches vectors on disk by content hash.
+    Identical texts (re-upserts, syndicated articles, re-runs) are embedded once;
+    the remaining texts are embedded in batches of batch_size.
+    """
+    def __init__(self, model=EMBEDDING_MODEL, cache_path="cache/embeddings.sqlite",
+                 batch_size=EMBEDDING_BATCH_SIZE):
+        self.model_name = model
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        # The model is part of the key, so switching models never returns stale vectors
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def lookup(self, keys):
+        found = {}
+        with self.lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+        return found
+
+    def store(self, vectors):
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in vectors.items()],
+            )
+            self.conn.commit()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        keys = [self.key(text) for text in input]
+        vectors = self.lookup(list(set(keys)))
+        missing = {}
+        for key, text in zip(keys, input):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            model = load_model(self.model_name)
+            pending = list(missing.items())
+            for i in range(0, len(pending), self.batch_size):
+                batch = pending[i:i + self.batch_size]
+                embedded = model([text for _, text in batch])
+                computed = {key: np.asarray(vector, dtype=np.float32).tolist() for (key, _), vector in zip(batch, embedded)}
+                self.store(computed)
+                vectors.update(computed)
+        return [vectors[key] for key in keys]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+embedders = {}
+
+
+def get_embedding_function(cache_path="cache/embeddings.sqlite", batch_size=None):
+    """
+    Shared cached embedding function per cache file, so every collection in the process
+    reuses the same cache connection and loaded model.
+    batch_size (default EMBEDDING_BATCH_SIZE) sets the batch size of the shared function.
+    """
+    with models_lock:
+        if cache_path not in embedders:
+            embedders[cache_path] = CachedEmbeddingFunction(cache_path=cache_path)
+        if batch_size:
+            embedders[cache_path].batch_size = batch_size
+        return embedders[cache_path]
@@ -0,0 +1,31 @@
+def chunk_text(text: str, max_words=200, overlap_words=40):
+    """
+    Splits an article into overlapping passages for embedding and retrieval.
+    - Paragraphs (lines) are packed together up to max_words per chunk.
+    - Paragraphs longer than max_words - overlap_words are cut into windows of that many words.
+    - Each chunk starts with the last overlap_words words of the previous one and has at most
+      max_words words including them.
+    Returns a list of chunk strings (a single chunk for short texts).
+    """
+    overlap_words = max(0, min(overlap_words, max_words - 1))
+    # New words per chunk, so the carried overlap always fits
+    step = max_words - overlap_words
+    paragraphs = []
+    for line in text.split("\n"):
+        words = line.split()
+        for i in range(0, len(words), step):
+            paragraphs.append(words[i:i + step])
+
+    chunks = []
+    current = []
+    fresh = 0
+    for words in paragraphs:
+        if fresh and len(current) + len(words) > max_words:
+            chunks.append(current)
+            current = current[-overlap_words:] if overlap_words else []
+            fresh = 0
+        current = current + words
+        fresh += len(words)
+    if fresh:
+        chunks.append(current)
+    return [" ".join(words) for words in chunks]
@@ -0,0 +1,141 @@
+import random
+import threading
+from collections import Counter
+
+from cyberthreat_article_process.search.semantic_search import mark_written
+
+
+class KnnGate:
+    """
+    Relevance pre-gate: decides 'approved' / 'rejected' from the verdicts of the most similar
+    already decided reports, so the LLM evaluator only sees uncertain reports.
+    - Verdicts are stored in the reports' metadata ("verdict", "verdict_source"); only LLM verdicts
+      are used as neighbours, so the gate never learns from its own guesses.
+    - The vote is weighted by similarity (1 / distance) over the LLM-decided neighbours within
+      max_distance; the confidence is the winning share, scaled down when there are fewer than
+      min_neighbors of them. Below threshold the gate returns None and the caller asks the LLM.
+    - A fraction audit_rate of confident decisions is still sent to the LLM to measure agreement.
+    """
+    VERDICTS = ("approved", "rejected")
+
+    def __init__(self, collection, k=7, threshold=0.9, min_neighbors=5, max_distance=1.0, audit_rate=0.05):
+        self.collection = collection
+        self.k = k
+        self.threshold = threshold
+        self.min_neighbors = min_neighbors
+        self.max_distance = max_distance
+        self.audit_rate = audit_rate
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        # report_id → (predicted verdict, audited) for reports handed to the LLM
+        self.pending = {}
+
+    def predict(self, report_id: str):
+        """
+        Returns (verdict, confidence) from the report's nearest LLM-decided neighbours;
+        verdict is None when no decided report is close enough.
+        """
+        stored = self.collection.get(ids=[report_id], include=["embeddings"])
+        embeddings = stored.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return None, 0.0
+        result = self.collection.query(
+            query_embeddings=[list(embeddings[0])],
+            n_results=self.k + 1,
+            where={"verdict_source": "llm"},
+            include=["metadatas", "distances"],
+        )
+        votes = Counter()
+        neighbours = 0
+        for neighbour_id, metadata, distance in zip(result["ids"][0], result["metadatas"][0], result["distances"][0]):
+            if neighbour_id == report_id or distance > self.max_distance:
+                continue
+            if metadata.get("verdict") in self.VERDICTS and neighbours < self.k:
+                votes[metadata["verdict"]] += 1 / (distance + 1e-6)
+                neighbours += 1
+        if not votes:
+            return None, 0.0
+        verdict, weight = votes.most_common(1)[0]
+        # Fewer than min_neighbors close neighbours lowers the confidence below any useful threshold
+        return verdict, weight / sum(votes.values()) * min(1.0, neighbours / self.min_neighbors)
+
+    def decide(self, report_id: str):
+        """
+        Returns the gate's verdict, or None if the LLM has to decide (uncertain or audited).
+        The prediction is kept so observe() can count agreement with the LLM.
+        """
+        try:
+            verdict, confidence = self.predict(report_id)
+        except Exception:
+            verdict, confidence = None, 0.0
+        with self.lock:
+            self.counts["reports"] += 1
+            if verdict is None or confidence < self.threshold:
+                self.counts["uncertain"] += 1
+                self.pending[report_id] = (verdict, False)
+                return None
+            if random.random() < self.audit_rate:
+                self.counts["audited"] += 1
+                self.pending[report_id] = (verdict, True)
+                return None
+            self.counts["gated"] += 1
+            self.counts[f"gated_{verdict}"] += 1
+        self.record(report_id, verdict, "knn")
+        return verdict
+
+    def observe(self, report_id: str, verdict: str):
+        """
+        Stores the LLM's verdict (it becomes a neighbour for later reports) and compares it
+        with the gate's prediction.
+        """
+        self.record(report_id, verdict, "llm")
+        with self.lock:
+            predicted, audited = self.pending.pop(report_id, (None, False))
+            self.counts["llm_calls"] += 1
+            if predicted is not None:
+                prefix = "audit" if audited else "uncertain"
+                self.counts[f"{prefix}_compared"] += 1
+                self.counts[f"{prefix}_agreed"] += predicted == verdict
+
+    def record(self, report_id: str, verdict: str, source: str):
+        # Metadata-only update: Chroma merges the keys, nothing is re-embedded
+        self.collection.update(ids=[report_id], metadatas=[{"verdict": verdict, "verdict_source": source}])
+        mark_written()
+
+    def backfill(self, ledger, page_size=500):
+        """
+        Stores the verdicts the LLM made before the gate existed (from the ledger states)
+        on reports that have no verdict yet, once per ledger database (later verdicts are stored
+        as they are made). Returns the number of reports updated.
+        """
+        if ledger.migrated("knn_gate_backfill"):
+            return 0
+        updated = 0
+        for verdict, states in (("approved", ("approved", "summarized")), ("rejected", ("rejected",))):
+            ids = ledger.ids_in_states(states)
+            for i in range(0, len(ids), page_size):
+                page = self.collection.get(ids=ids[i:i + page_size], include=["metadatas"])
+                missing = [report_id for report_id, metadata in zip(page["ids"], page["metadatas"])
+                           if not metadata.get("verdict")]
+                if missing:
+                    self.collection.update(ids=missing, metadatas=[{"verdict": verdict, "verdict_source": "llm"}
+                                                                   for _ in missing])
+                    updated += len(missing)
+        if updated:
+            mark_written()
+        ledger.mark_migrated("knn_gate_backfill")
+        return updated
+
+    def stats(self):
+        """
+        Hit rate = share of reports decided without the LLM; agreement = share of compared
+        predictions (audits of confident ones, and low-confidence guesses) the LLM agreed with.
+        """
+        with self.lock:
+            counts = dict(self.counts)
+        reports = counts.get("reports", 0)
+        stats = dict(counts, hit_rate=counts.get("gated", 0) / reports if reports else 0.0)
+        for prefix in ("audit", "uncertain"):
+            compared = counts.get(f"{prefix}_compared", 0)
+            stats[f"{prefix}_agreement"] = counts.get(f"{prefix}_agreed", 0) / compared if compared else None
+        return stats
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class ProcessingLedger:
+    """
+    Persistent processing state of every article (SQLite, next to the Chroma DB).
+
+    Lifecycle:
+        discovered → fetched → evaluating → approved / rejected → summarized
+    Any step may end in 'failed'; the state to resume from is kept and the article is retried
+    until max_attempts failures. 'rejected' and 'summarized' are final: decided articles are
+    never sent to the LLM again.
+    """
+    STATES = ("discovered", "fetched", "evaluating", "approved", "rejected", "summarized", "failed")
+    FINAL_STATES = ("rejected", "summarized")
+    # Interrupted work first, then new articles, then retries
+    RESUME_ORDER = {"approved": 0, "evaluating": 1, "fetched": 2, "failed": 3}
+
+    def __init__(self, path="./db/processing_state.sqlite", max_attempts=3):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "id TEXT PRIMARY KEY, state TEXT NOT NULL, resume_state TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "last_error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS articles_state ON articles (state)")
+        # One-time migrations and backfills that already ran against this database
+        self.conn.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, applied_at REAL NOT NULL)")
+        self.conn.commit()
+
+    def migrated(self, name: str) -> bool:
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone() is not None
+
+    def mark_migrated(self, name: str):
+        with self.lock:
+            self.conn.execute("INSERT OR IGNORE INTO migrations VALUES (?, ?)", (name, time.time()))
+            self.conn.commit()
+
+    def record(self, article_id: str, state: str, error=None):
+        """
+        Moves an article to a state (creating it if needed).
+        'failed' keeps the previous state as the resume point and counts an attempt.
+        """
+        self.record_many([article_id], state, error)
+
+    def record_many(self, article_ids, state: str, error=None):
+        if state not in self.STATES:
+            raise ValueError(f"Unknown processing state '{state}', expected one of {self.STATES}")
+        now = time.time()
+        with self.lock:
+            for article_id in article_ids:
+                row = self.conn.execute(
+                    "SELECT state, resume_state FROM articles WHERE id = ?", (article_id,)
+                ).fetchone()
+                if row is None:
+                    self.conn.execute(
+                        "INSERT INTO articles (id, state, resume_state, attempts, last_error, created_at, updated_at) "
+                        "VALUES (?, ?, NULL, ?, ?, ?, ?)",
+                        (article_id, state, 1 if state == "failed" else 0, error, now, now),
+                    )
+                elif state == "failed":
+                    resume_state = row[1] if row[0] == "failed" else row[0]
+                    self.conn.execute(
+                        "UPDATE articles SET state = 'failed', resume_state = ?, attempts = attempts + 1, "
+                        "last_error = ?, updated_at = ? WHERE id = ?",
+                        (resume_state, error, now, article_id),
+                    )
+                else:
+                    self.conn.execute(
+                        "UPDATE articles SET state = ?, resume_state = NULL, updated_at = ? WHERE id = ?",
+                        (state, now, article_id),
+                    )
+            self.conn.commit()
+
+    def register(self, article_ids, state: str):
+        """
+        Adds articles that are not in the ledger yet, leaving known ones untouched.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO articles (id, state, attempts, created_at, updated_at) VALUES (?, ?, 0, ?, ?)",
+                [(article_id, state, now, now) for article_id in article_ids],
+            )
+            self.conn.commit()
+
+    def state(self, article_id: str):
+        """
+        Returns the state to continue from (the resume point for failed articles), or None if unknown.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT state, resume_state FROM articles WHERE id = ?", (article_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        if row[0] == "failed":
+            return row[1] or "fetched"
+        return row[0]
+
+    def actionable(self, limit=None):
+        """
+        Returns the IDs of articles that still need work: fetched, interrupted mid-way,
+        or failed fewer than max_attempts times. Final and discovered-only articles are skipped.
+        """
+        order = " ".join(f"WHEN '{state}' THEN {rank}" for state, rank in self.RESUME_ORDER.items())
+        query = (
+            "SELECT id FROM articles WHERE state IN ('fetched', 'evaluating', 'approved') "
+            "OR (state = 'failed' AND attempts < ?) "
+            f"ORDER BY CASE state {order} END, updated_at"
+        )
+        params = [self.max_attempts]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self.lock:
+            return [row[0] for row in self.conn.execute(query, params)]
+
+    def ids_in_states(self, states):
+        """
+        Returns the IDs of the articles currently in one of the given states.
+        """
+        states = list(states)
+        with self.lock:
+            return [row[0] for row in self.conn.execute(
+                f"SELECT id FROM articles WHERE state IN ({','.join('?' * len(states))})", states)]
+
+    def counts(self):
+        with self.lock:
+            return dict(self.conn.execute("SELECT state, COUNT(*) FROM articles GROUP BY state"))
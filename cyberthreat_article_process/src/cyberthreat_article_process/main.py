@@ -1,4 +1,6 @@
 #!/usr/bin/env python
+import asyncio
+import os
 from random import randint
 
 from pydantic import BaseModel
@@ -7,35 +9,259 @@ from crewai.flow import Flow, listen, start
 
 from cyberthreat_article_process.crawler.cyber_threat_crawler import CyberThreatCrawler
 
+from cyberthreat_article_process.crews.batch_report_evaluation.batch_report_evaluation import BatchReportEvaluation
+from cyberthreat_article_process.crews.batch_report_evaluation.batching import pack_batches, report_entry
+from cyberthreat_article_process.crews.crew_pool import crew_pool
 from cyberthreat_article_process.crews.is_report_worth_processing.is_report_worth_processing import IsReportWorthProcessing
 from cyberthreat_article_process.crews.report_processing.report_processing import ReportProcessing
+from cyberthreat_article_process.gate.knn_gate import KnnGate
 
 
 class CyberThreatFlow(Flow):
     START_URL = "https://krebsonsecurity.com/"
-    scraper = CyberThreatCrawler(start_url=START_URL)
+    scraper = CyberThreatCrawler(start_url=START_URL, incremental=True)
+    # Reports processed per run (0 = every actionable report) and crews running at the same time.
+    # Concurrent instances of a crew share its max_rpm limiter (crew_pool), so more concurrency
+    # overlaps non-LLM work and queues on the limit instead of multiplying the request rate.
+    batch_size = int(os.getenv("PROCESSING_BATCH_SIZE", "2")) or None
+    max_concurrency = max(1, int(os.getenv("PROCESSING_CONCURRENCY", "4")))
+    # Actionable reports loaded (and batch-evaluated) together; bounds memory with PROCESSING_BATCH_SIZE=0
+    page_size = max(1, int(os.getenv("PROCESSING_PAGE_SIZE", "100")))
+    # Process reports while the crawl is still running instead of after it
+    streaming = os.getenv("STREAMING", "").lower() in ("1", "true", "yes")
+    started = 0
+    # Decides reports like their nearest already-decided neighbours when confident (KNN_GATE=0 disables it)
+    # Batch relevance evaluation: up to EVAL_BATCH_SIZE reports per LLM request (0 = one report per request)
+    evaluation_batch_size = int(os.getenv("EVAL_BATCH_SIZE", "0"))
+    evaluation_token_budget = int(os.getenv("EVAL_TOKEN_BUDGET", "6000"))
+    # Batch prompts show each report's passages closest to this query instead of the article's beginning
+    EXCERPT_QUERY = "cyber attack, exploited vulnerability, CVE, malware, ransomware, data breach, threat actor"
+    gate = KnnGate(scraper.collection, threshold=float(os.getenv("KNN_GATE_THRESHOLD", "0.9"))) \
+        if os.getenv("KNN_GATE", "1") != "0" else None
     
 
     @start()
-    def scrape_articles(self):
+    async def scrape_articles(self):
         print("Scrape given website")
         START_URL = "https://krebsonsecurity.com/"
-        self.scraper.scrape_all_pages_dynamic(START_URL)
-        
+        if self.streaming:
+            self.started = await self.crawl_and_process(START_URL)
+        else:
+            self.scraper.scrape_all_pages_dynamic(START_URL)
+
+    async def crawl_and_process(self, start_url):
+        """
+        Streaming mode: the crawl runs in a worker thread and pushes every newly stored report ID
+        onto a bounded queue; reports are evaluated and extracted as soon as they arrive,
+        at most max_concurrency at a time. While all workers are busy the queue fills up
+        and the crawler waits (backpressure). Returns the number of reports started.
+        """
+        loop = asyncio.get_running_loop()
+        stream = self.scraper.open_stream(maxsize=self.max_concurrency * 2)
+
+        def crawl():
+            try:
+                self.scraper.scrape_all_pages_dynamic(start_url)
+            finally:
+                self.scraper.end_stream()
+
+        crawler = loop.run_in_executor(None, crawl)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        workers = []
+        processed_ids = []
+
+        async def worker(report_id):
+            try:
+                for report in await asyncio.to_thread(self.scraper.get_articles, [report_id]):
+                    if await self.process_report(report):
+                        processed_ids.append(report_id)
+            finally:
+                semaphore.release()
+
+        try:
+            while True:
+                report_id = await loop.run_in_executor(None, stream.get)
+                if report_id is None:
+                    break
+                if self.batch_size and len(workers) >= self.batch_size:
+                    # Over the run's budget: keep draining so the crawl finishes, the rest stays 'fetched'
+                    continue
+                await semaphore.acquire()
+                workers.append(asyncio.create_task(worker(report_id)))
+            await asyncio.gather(*workers, return_exceptions=True)
+            await crawler
+        finally:
+            self.scraper.mark_articles_as_processed(processed_ids)
+        return len(workers)
+
     @listen(scrape_articles)
-    def process_articles(self):
-        unprocessed = self.scraper.get_unprocessed_articles()
-        for report in unprocessed[:2]:
-            result = (IsReportWorthProcessing().crew().kickoff(inputs={"report" : report}))
-            print(f"Report: {result} - {report['metadata']['title']} - {report['metadata']['url']}")
-            print(str(result).strip().lower())
-            if (str(result).strip().lower() == "approved"):
-                ReportProcessing().crew().kickoff(inputs={"report" : report})
-                self.scraper.mark_article_as_processed(report['id'])
+    async def process_articles(self):
+        """
+        Processes up to batch_size actionable reports, at most max_concurrency at a time.
+        Each report runs in its own task, so one failing report doesn't stop the others.
+        In streaming mode only what the stream left of the batch is processed here (older backlog).
+        """
+        self.scraper.sync_ledger()
+        self.scraper.sync_lexical_index()
+        if self.gate:
+            self.gate.backfill(self.scraper.ledger)
+        limit = self.batch_size
+        if self.streaming and limit:
+            limit -= self.started
+            if limit <= 0:
+                print(f"Processing states: {self.scraper.ledger.counts()}")
+                return
+        # One page of report bodies in memory at a time, also when the whole backlog is processed
+        pages = self.scraper.iter_actionable_pages(limit=limit, page_size=self.page_size)
+        while (reports := await asyncio.to_thread(next, pages, None)) is not None:
+            await self.process_page(reports)
+        print(f"Processing states: {self.scraper.ledger.counts()}")
+        print(f"Crew construction: {crew_pool.stats()}")
+        if self.gate:
+            print(f"Pre-gate: {self.gate.stats()}")
+
+    async def process_page(self, reports):
+        """
+        Processes one page of actionable reports, at most max_concurrency at a time.
+        """
+        gated = await self.evaluate_in_batches(reports) if self.evaluation_batch_size > 1 else set()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        processed_ids = []
+
+        async def worker(report):
+            async with semaphore:
+                if await self.process_report(report, gated=report['id'] in gated):
+                    processed_ids.append(report['id'])
+
+        try:
+            await asyncio.gather(*(worker(report) for report in reports), return_exceptions=True)
+        finally:
+            # One metadata-only update per page, also when the run is interrupted:
+            # the IDs are collected as the reports finish, not from the gather's results
+            self.scraper.mark_articles_as_processed(processed_ids)
+
+    async def evaluate_in_batches(self, reports):
+        """
+        Decides the relevance of the reports that still need it with one LLM request per batch
+        (sized by evaluation_token_budget and evaluation_batch_size) instead of one per report.
+        The verdicts are recorded in the ledger, so process_report continues with the extraction.
+        Reports the batch couldn't decide are left for the single-report evaluator.
+        Returns the IDs the pre-gate already saw, so process_report doesn't ask it again.
+        """
+        ledger = self.scraper.ledger
+        pending = []
+        gated = set()
+        for report in reports:
+            if ledger.state(report['id']) not in ("discovered", "fetched", "evaluating"):
+                continue
+            ledger.record(report['id'], "evaluating")
+            state = None
+            if self.gate:
+                state = await asyncio.to_thread(self.gate.decide, report['id'])
+                gated.add(report['id'])
+            if state:
+                ledger.record(report['id'], state)
+            else:
+                pending.append(report)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def worker(batch, excerpts):
+            async with semaphore:
+                await self.evaluate_batch(batch, excerpts)
+
+        batches = pack_batches(pending, self.evaluation_token_budget, self.evaluation_batch_size)
+        excerpts = await asyncio.to_thread(self.report_excerpts, pending) if len(pending) > 1 else {}
+        await asyncio.gather(*(worker(batch, excerpts) for batch in batches), return_exceptions=True)
+        return gated
+
+    def report_excerpts(self, reports, n_chunks=2):
+        """
+        report_id → the report's n_chunks passages most relevant to EXCERPT_QUERY.
+        Reports without stored passages get none and fall back to the beginning of the article.
+        """
+        excerpts = {}
+        for report in reports:
+            try:
+                excerpts[report['id']] = self.scraper.report_excerpt(report['id'], self.EXCERPT_QUERY, n_chunks)
+            except Exception as e:
+                print(f"❌ Passages of {report['id']} unavailable: {e}")
+        return excerpts
+
+    async def evaluate_batch(self, reports, excerpts=None):
+        """
+        Evaluates a batch in one request. Reports without a clear verdict (missing, 'Uncertain',
+        or the whole request failed) are split in halves and retried; a single leftover report
+        stays 'evaluating' for the single-report evaluator.
+        """
+        if len(reports) < 2:
+            return
+        excerpts = excerpts or {}
+        keys = {f"R{n}": report for n, report in enumerate(reports, start=1)}
+        verdicts = {}
+        try:
+            with crew_pool.acquire(BatchReportEvaluation) as crew:
+                result = await crew.kickoff_async(
+                    inputs={"reports": "\n".join(report_entry(key, report, excerpt=excerpts.get(report['id']))
+                                                  for key, report in keys.items())}
+                )
+            verdicts = {verdict.report_key.strip().strip("[]"): verdict.verdict.strip().lower()
+                        for verdict in result.pydantic.verdicts}
+        except Exception as e:
+            print(f"❌ Batch evaluation of {len(reports)} reports failed: {e}")
+        undecided = []
+        for key, report in keys.items():
+            state = verdicts.get(key)
+            if state in ("approved", "rejected"):
+                print(f"Report: {state} (batch) - {report['metadata']['title']} - {report['metadata']['url']}")
+                if self.gate:
+                    await asyncio.to_thread(self.gate.observe, report['id'], state)
+                self.scraper.ledger.record(report['id'], state)
+            else:
+                undecided.append(report)
+        if len(undecided) > 1:
+            middle = len(undecided) // 2
+            await self.evaluate_batch(undecided[:middle], excerpts)
+            await self.evaluate_batch(undecided[middle:], excerpts)
+
+    async def process_report(self, report, gated=False):
+        """
+        Runs a report through the rest of its lifecycle, resuming from its ledger state.
+        A decided report is never evaluated again. Returns True if the report was summarized.
+        gated: the pre-gate was already uncertain about it (evaluate_in_batches), go straight to the LLM.
+        """
+        ledger = self.scraper.ledger
+        state = ledger.state(report['id'])
+        try:
+            if state in ("discovered", "fetched", "evaluating"):
+                ledger.record(report['id'], "evaluating")
+                # The gate's Chroma queries run off the flow's event loop
+                state = await asyncio.to_thread(self.gate.decide, report['id']) if self.gate and not gated else None
+                if state:
+                    print(f"Report: {state} by similar reports - {report['metadata']['title']} - {report['metadata']['url']}")
+                else:
+                    with crew_pool.acquire(IsReportWorthProcessing) as crew:
+                        result = await crew.kickoff_async(inputs={"report" : report})
+                    print(f"Report: {result} - {report['metadata']['title']} - {report['metadata']['url']}")
+                    print(str(result).strip().lower())
+                    state = "approved" if str(result).strip().lower() == "approved" else "rejected"
+                    if self.gate:
+                        await asyncio.to_thread(self.gate.observe, report['id'], state)
+                ledger.record(report['id'], state)
+            if state == "approved":
+                with crew_pool.acquire(ReportProcessing) as crew:
+                    # The report's own URL becomes the threats' source article in the threat index
+                    await crew.kickoff_async(inputs={"report" : report, "report_url": report['metadata']['url']})
+                ledger.record(report['id'], "summarized")
+                return True
+        except Exception as e:
+            print(f"❌ Processing {report['id']} failed: {e}")
+            ledger.record(report['id'], "failed", error=str(e))
+        return False
     
     @listen(process_articles)
     def processed_articles(self):
-        processed_articles = self.scraper.get_processed_articles()
+        processed_articles = self.scraper.iter_processed_articles(include_content=False)
         for article in processed_articles:
             print(f"📄 {article['metadata']['title']} - {article['metadata']['url']}")
 
@@ -36,4 +36,15 @@ class EmergingThreat(BaseModel):
 class CyberThreatIntel(BaseModel):
     """Top-level schema for structured cybersecurity threat intelligence output."""
     known_threats: List[KnownThreat] = Field(..., description="List of documented cybersecurity threats.")
-    emerging_threats: List[EmergingThreat] = Field(..., description="List of emerging, potentially unknown threats.")
\ No newline at end of file
+    emerging_threats: List[EmergingThreat] = Field(..., description="List of emerging, potentially unknown threats.")
+
+class ReportVerdict(BaseModel):
+    """Relevance verdict for one report of a batch evaluation."""
+    report_key: str = Field(..., description="The key of the report as given in the batch (e.g. R1).")
+    verdict: str = Field(..., description="'Approved', 'Rejected', or 'Uncertain' if the excerpt is not enough to decide.")
+    reason: Optional[str] = Field(None, description="One short sentence explaining the verdict.")
+
+
+class BatchVerdicts(BaseModel):
+    """Verdicts of a batch relevance evaluation, one per report."""
+    verdicts: List[ReportVerdict] = Field(..., description="One verdict for every report in the batch.")
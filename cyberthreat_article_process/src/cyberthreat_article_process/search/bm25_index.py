@@ -0,0 +1,179 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+# Identifiers stay whole ("cve-2024-3400", "192.168.1.10", "lockbit3.0"), their parts are indexed too
+# (queries only use the parts of identifiers the index doesn't know, see query_terms)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[._\-/:][a-z0-9]+)*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it", "its",
+    "of", "on", "or", "that", "the", "this", "to", "was", "were", "will", "with",
+}
+
+
+def split_token(token: str):
+    parts = re.split(r"[._\-/:]", token)
+    return [part for part in parts if part and part not in STOPWORDS] if len(parts) > 1 else []
+
+
+def tokenize(text: str):
+    tokens = []
+    for token in TOKEN_PATTERN.findall(str(text or "").lower()):
+        if token not in STOPWORDS:
+            tokens.append(token)
+        tokens.extend(split_token(token))
+    return tokens
+
+
+def query_terms(query: str):
+    """
+    [(token, parts)] of a query: identifiers are searched whole, their parts are only a fallback.
+    """
+    return [(token, split_token(token)) for token in TOKEN_PATTERN.findall(str(query or "").lower())
+            if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    On-disk (SQLite) inverted term index over report content with BM25 ranking.
+    - postings (term, doc_id, tf) is clustered by term, so a query reads only its terms' postings;
+      document frequencies and lengths are kept alongside, no document is ever loaded.
+    - add()/add_many() update the index incrementally; re-adding a document replaces its postings.
+    """
+    def __init__(self, path="./db/report_terms.sqlite", k1=1.2, b=0.75, max_part_share=0.5):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        # Fallback parts in more than this share of the reports ("cve", "2024") are not searched
+        self.max_part_share = max_part_share
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings (term TEXT NOT NULL, doc_id TEXT NOT NULL, tf INTEGER NOT NULL, "
+            "PRIMARY KEY (term, doc_id)) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS documents (doc_id TEXT PRIMARY KEY, length INTEGER NOT NULL) WITHOUT ROWID")
+        # Running document count and total length, so a query never scans the documents table
+        self.conn.execute("CREATE TABLE IF NOT EXISTS corpus (id INTEGER PRIMARY KEY CHECK (id = 0), "
+                          "documents INTEGER NOT NULL, length INTEGER NOT NULL)")
+        self.conn.execute("INSERT OR IGNORE INTO corpus VALUES (0, 0, 0)")
+        # Set once the reports stored before the index existed were added (see backfilled)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS backfill (id INTEGER PRIMARY KEY CHECK (id = 0), done_at REAL)")
+        self.conn.commit()
+
+    def add(self, doc_id: str, text: str):
+        self.add_many([(doc_id, text)])
+
+    def add_many(self, documents):
+        """
+        Indexes (doc_id, text) pairs in one transaction.
+        """
+        with self.lock:
+            for doc_id, text in documents:
+                self.remove_locked(doc_id)
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                self.conn.execute("INSERT INTO documents VALUES (?, ?)", (doc_id, length))
+                self.conn.execute("UPDATE corpus SET documents = documents + 1, length = length + ?", (length,))
+                self.conn.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                                      [(term, doc_id, tf) for term, tf in counts.items()])
+                self.conn.executemany(
+                    "INSERT INTO terms VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                    [(term,) for term in counts],
+                )
+            self.conn.commit()
+
+    def remove_locked(self, doc_id: str):
+        row = self.conn.execute("SELECT length FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return
+        terms = [term for (term,) in self.conn.execute("SELECT term FROM postings WHERE doc_id = ?", (doc_id,))]
+        self.conn.execute("UPDATE corpus SET documents = documents - 1, length = length - ?", (row[0],))
+        self.conn.executemany("UPDATE terms SET df = df - 1 WHERE term = ?", [(term,) for term in terms])
+        self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+    def remove(self, doc_id: str):
+        with self.lock:
+            self.remove_locked(doc_id)
+            self.conn.commit()
+
+    def __contains__(self, doc_id):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM documents WHERE doc_id = ?", (doc_id,)).fetchone() is not None
+
+    def missing(self, doc_ids):
+        """
+        Returns the given IDs that are not indexed yet.
+        """
+        doc_ids = list(doc_ids)
+        found = set()
+        with self.lock:
+            for i in range(0, len(doc_ids), 500):
+                chunk = doc_ids[i:i + 500]
+                found.update(row[0] for row in self.conn.execute(
+                    f"SELECT doc_id FROM documents WHERE doc_id IN ({','.join('?' * len(chunk))})", chunk))
+        return [doc_id for doc_id in doc_ids if doc_id not in found]
+
+    def backfilled(self) -> bool:
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM backfill").fetchone() is not None
+
+    def mark_backfilled(self):
+        with self.lock:
+            self.conn.execute("INSERT OR IGNORE INTO backfill VALUES (0, ?)", (time.time(),))
+            self.conn.commit()
+
+    def search(self, query: str, n_results=10):
+        """
+        Returns [(doc_id, score)] of the best BM25 matches, best first.
+        - Identifiers are matched whole ("cve-2024-3400"), so a query reads only their own postings.
+        - An identifier the index doesn't know falls back to its parts, except parts so common that
+          they match most reports: an unknown CVE returns nothing instead of every 2024 report.
+        """
+        groups = query_terms(query)
+        candidates = list(dict.fromkeys(term for token, parts in groups for term in [token] + parts))
+        if not candidates:
+            return []
+        with self.lock:
+            total, length_sum = self.conn.execute("SELECT documents, length FROM corpus").fetchone()
+            if not total:
+                return []
+            average_length = length_sum / total
+            placeholders = ",".join("?" * len(candidates))
+            df = dict(self.conn.execute(f"SELECT term, df FROM terms WHERE term IN ({placeholders}) AND df > 0",
+                                        candidates))
+            terms = []
+            for token, parts in groups:
+                if token in df:
+                    terms.append(token)
+                else:
+                    terms.extend(part for part in parts if part in df and df[part] <= total * self.max_part_share)
+            terms = list(dict.fromkeys(terms))
+            if not terms:
+                return []
+            placeholders = ",".join("?" * len(terms))
+            rows = self.conn.execute(
+                "SELECT p.term, p.doc_id, p.tf, d.length FROM postings p JOIN documents d ON d.doc_id = p.doc_id "
+                f"WHERE p.term IN ({placeholders})",
+                terms,
+            ).fetchall()
+        scores = Counter()
+        for term, doc_id, tf, length in rows:
+            idf = math.log(1 + (total - df[term] + 0.5) / (df[term] + 0.5))
+            scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / average_length))
+        return scores.most_common(n_results)
+
+    def stats(self):
+        with self.lock:
+            documents = self.conn.execute("SELECT documents FROM corpus").fetchone()[0]
+            terms = self.conn.execute("SELECT COUNT(*) FROM terms WHERE df > 0").fetchone()[0]
+        return {"documents": documents, "terms": terms}
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import chromadb
+
+from cyberthreat_article_process.embeddings.cached_embedder import get_embedding_function
+from cyberthreat_article_process.search.bm25_index import BM25Index
+
+# Rewritten on every write to the reports or threats collections; its content is the cache generation,
+# so search caches in other processes (dashboards, the CLI) see writes too
+GENERATION_PATH = "./db/search_generation"
+
+
+def mark_written(path=GENERATION_PATH):
+    """
+    Invalidates cached search results (in every process) after a write to a searchable collection.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as file:
+        file.write(f"{time.time_ns()}-{os.getpid()}-{threading.get_ident()}")
+
+
+def generation(path=GENERATION_PATH) -> str:
+    try:
+        with open(path) as file:
+            return file.read()
+    except FileNotFoundError:
+        return ""
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU mapping with hit/miss counters.
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+    def stats(self):
+        return {"size": len(self.items), "hits": self.hits, "misses": self.misses}
+
+
+def result_date(metadata: dict) -> str:
+    """
+    "YYYY-MM-DD" (or "YYYY-MM") of a report: its publish date, else the date in its URL.
+    """
+    if metadata.get("published"):
+        return str(metadata["published"])[:10]
+    match = re.search(r"/(\d{4})/(\d{2})/", urlparse(metadata.get("url", "")).path)
+    return f"{match.group(1)}-{match.group(2)}" if match else ""
+
+
+class SemanticSearch:
+    """
+    Top-k similarity search over the reports and cyber_threats collections.
+    - Query embeddings are cached (LRU) by text; both collections use the same embedding function.
+    - Results are cached (LRU) by query, filters and write generation, so repeated queries
+      return without touching Chroma until something is written.
+    - Reports can also be searched by keyword (BM25) or hybrid, see search_reports.
+    - Filters: processed, site, date_from/date_to ("YYYY-MM-DD" prefixes) for reports;
+      threat_type and kind for threats.
+    """
+    def __init__(self, reports_path="./db/cyberthreat_reports", threats_path="./db/threats",
+                 lexical_path="./db/report_terms.sqlite", generation_path=GENERATION_PATH, cache_size=256):
+        self.embedding_function = get_embedding_function()
+        self.reports = chromadb.PersistentClient(path=reports_path).get_or_create_collection(
+            name="reports", embedding_function=self.embedding_function
+        )
+        self.threats = chromadb.PersistentClient(path=threats_path).get_or_create_collection(
+            name="cyber_threats", embedding_function=self.embedding_function
+        )
+        self.lexical_index = BM25Index(lexical_path)
+        self.generation_path = generation_path
+        self.embeddings = LRUCache(cache_size)
+        self.results = LRUCache(cache_size)
+
+    def embed(self, query: str):
+        vector = self.embeddings.get(query)
+        if vector is None:
+            vector = self.embedding_function([query])[0]
+            self.embeddings.put(query, vector)
+        return vector
+
+    def cached(self, key, compute):
+        key = (generation(self.generation_path),) + key
+        result = self.results.get(key)
+        if result is None:
+            result = compute()
+            self.results.put(key, result)
+        return result
+
+    def run_query(self, collection, query: str, n_results: int, where: dict):
+        if collection.count() == 0:
+            return []
+        result = collection.query(
+            query_embeddings=[self.embed(query)],
+            n_results=min(n_results, collection.count()),
+            where=where or None,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            {"id": result_id, "document": document, "metadata": metadata, "distance": distance}
+            for result_id, document, metadata, distance in zip(
+                result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0]
+            )
+        ]
+
+    def report_filter(self, processed=None, site=None, date_from=None, date_to=None):
+        """
+        Predicate on report metadata for the filters Chroma can't apply (see search_reports).
+        """
+        def accepts(metadata):
+            date = result_date(metadata)
+            if processed is not None and metadata.get("processed") != processed:
+                return False
+            if site and urlparse(metadata.get("url", "")).netloc.removeprefix("www.") != site.removeprefix("www."):
+                return False
+            if date_from and (not date or date < date_from[:len(date)]):
+                return False
+            if date_to and (not date or date > date_to[:len(date)]):
+                return False
+            return True
+        return accepts
+
+    def vector_reports(self, query: str, n_results, processed=None, site=None, date_from=None, date_to=None):
+        where = {"processed": processed} if processed is not None else None
+        post_filtered = site or date_from or date_to
+        hits = self.run_query(self.reports, query, n_results * 4 if post_filtered else n_results, where)
+        accepts = self.report_filter(processed, site, date_from, date_to)
+        return [hit for hit in hits if accepts(hit["metadata"])][:n_results]
+
+    def keyword_reports(self, query: str, n_results, processed=None, site=None, date_from=None, date_to=None):
+        filtered = processed is not None or site or date_from or date_to
+        scored = self.lexical_index.search(query, n_results * 4 if filtered else n_results)
+        if not scored:
+            return []
+        ids = [doc_id for doc_id, _ in scored]
+        # Metadata only, the documents stay on disk
+        stored = self.reports.get(ids=ids, include=["metadatas"])
+        metadata_by_id = dict(zip(stored["ids"], stored["metadatas"]))
+        accepts = self.report_filter(processed, site, date_from, date_to)
+        hits = [
+            {"id": doc_id, "document": None, "metadata": metadata_by_id[doc_id], "score": score}
+            for doc_id, score in scored
+            if doc_id in metadata_by_id and accepts(metadata_by_id[doc_id])
+        ]
+        return hits[:n_results]
+
+    def search_reports(self, query: str, n_results=5, processed=None, site=None, date_from=None, date_to=None,
+                       mode="vector"):
+        """
+        Reports matching the query.
+        - mode="vector": most similar by embedding; "keyword": best BM25 matches (exact CVE IDs, malware
+          names, IPs), without loading documents; "hybrid": both lists fused by reciprocal rank.
+        - processed is filtered in Chroma; site and dates are checked on the results (older reports
+          have no site key), over-fetching to still return n_results.
+        """
+        filters = {"processed": processed, "site": site, "date_from": date_from, "date_to": date_to}
+
+        def compute():
+            if mode == "vector":
+                return self.vector_reports(query, n_results, **filters)
+            if mode == "keyword":
+                return self.keyword_reports(query, n_results, **filters)
+            if mode == "hybrid":
+                return self.fuse([self.vector_reports(query, n_results * 2, **filters),
+                                  self.keyword_reports(query, n_results * 2, **filters)], n_results)
+            raise ValueError(f"Unknown search mode '{mode}', expected vector, keyword or hybrid")
+
+        return self.cached(("reports", mode, query, n_results, processed, site, date_from, date_to), compute)
+
+    def fuse(self, rankings, n_results, k=60):
+        """
+        Reciprocal rank fusion: score = sum of 1 / (k + rank) over the rankings a report appears in.
+        """
+        fused = {}
+        for ranking in rankings:
+            for rank, hit in enumerate(ranking, start=1):
+                entry = fused.setdefault(hit["id"], dict(hit, rrf_score=0.0))
+                entry["rrf_score"] += 1 / (k + rank)
+                for key in ("document", "distance", "score"):
+                    if entry.get(key) is None and hit.get(key) is not None:
+                        entry[key] = hit[key]
+        return sorted(fused.values(), key=lambda hit: hit["rrf_score"], reverse=True)[:n_results]
+
+    def search_threats(self, query: str, n_results=5, threat_type=None, kind=None):
+        """
+        Stored threats most similar to the query, optionally of one threat_type / kind (known, emerging).
+        """
+        def compute():
+            conditions = [{key: value} for key, value in (("threat_type", threat_type), ("kind", kind)) if value]
+            where = conditions[0] if len(conditions) == 1 else {"$and": conditions} if conditions else None
+            return self.run_query(self.threats, query, n_results, where)
+
+        return self.cached(("threats", query, n_results, threat_type, kind), compute)
+
+    def stats(self):
+        return {"embeddings": self.embeddings.stats(), "results": self.results.stats()}
+
+
+def main():
+    """
+    Command line search, e.g. `search "ransomware hospital" --site krebsonsecurity.com --from 2024-01`
+    or `search "citrix netscaler" --threats --threat-type vulnerability`.
+    """
+    parser = argparse.ArgumentParser(description="Semantic search over stored reports and threats.")
+    parser.add_argument("query")
+    parser.add_argument("-k", "--top-k", type=int, default=5)
+    parser.add_argument("--threats", action="store_true", help="Search the cyber_threats collection")
+    parser.add_argument("--mode", choices=["vector", "keyword", "hybrid"], default="vector",
+                        help="Report ranking: embeddings, BM25 keywords or both")
+    parser.add_argument("--processed", choices=["true", "false"])
+    parser.add_argument("--site")
+    parser.add_argument("--from", dest="date_from")
+    parser.add_argument("--to", dest="date_to")
+    parser.add_argument("--threat-type")
+    parser.add_argument("--kind", choices=["known", "emerging"])
+    parser.add_argument("--json", action="store_true", help="Print the raw results as JSON")
+    args = parser.parse_args()
+
+    search = SemanticSearch()
+    if args.threats:
+        results = search.search_threats(args.query, args.top_k, threat_type=args.threat_type, kind=args.kind)
+    else:
+        processed = None if args.processed is None else args.processed == "true"
+        results = search.search_reports(args.query, args.top_k, processed=processed, site=args.site,
+                                        date_from=args.date_from, date_to=args.date_to, mode=args.mode)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        metadata = result["metadata"]
+        if args.threats:
+            title = metadata.get("cve_id") or metadata.get("name") or metadata.get("threat_type")
+            print(f"{result['distance']:.3f}  {title} - {metadata.get('affected_product', '')} ({metadata.get('source_url', '')})")
+        else:
+            score = result.get("rrf_score", result.get("distance", result.get("score")))
+            print(f"{score:.3f}  {metadata.get('title')} - {metadata.get('url')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,31 +2,131 @@ from crewai.tools import tool
 import chromadb
 import json
 
+from cyberthreat_article_process.embeddings.cached_embedder import get_embedding_function
+from cyberthreat_article_process.search.semantic_search import mark_written
+from cyberthreat_article_process.tools.report_processing.entity_resolution import (
+    canonical_cve, entity_id, merge_threats, product_key, resolve_threats, same_entity,
+)
+from cyberthreat_article_process.tools.report_processing.threat_index import ThreatIndex
+
 # Initialize ChromaDB client
 client = chromadb.PersistentClient(path="./db/threats")
-collection = client.get_or_create_collection(name="cyber_threats")
+collection = client.get_or_create_collection(name="cyber_threats", embedding_function=get_embedding_function())
+# CVE / ATT&CK technique / product / reference → threat and source article lookups
+threat_index = ThreatIndex("./db/threat_index.sqlite")
+
+
+def threat_metadata(kind: str, threat: dict, source_url: str) -> dict:
+    """
+    Filterable metadata of a threat; Chroma only accepts scalar values, so None is dropped
+    and the ATT&CK technique list is stored comma-separated.
+    product_key is the entity-resolution block key.
+    """
+    references = threat.get("references") or []
+    metadata = {
+        "source": "cybersecurity_report",
+        "kind": kind,
+        "threat_type": threat.get("threat_type"),
+        "cve_id": canonical_cve(threat.get("cve_id")),
+        "name": threat.get("name"),
+        "affected_product": threat.get("affected_product"),
+        "product_key": product_key(threat.get("affected_product")),
+        "severity": threat.get("severity"),
+        "mitre_attck_techniques": ",".join(threat.get("mitre_attck_techniques") or []) or None,
+        "source_url": source_url or next((ref for ref in references if str(ref).startswith("http")), None),
+    }
+    return {key: str(value) for key, value in metadata.items() if value is not None}
+
+
+def threat_records(threat_data: dict):
+    """
+    Splits a CyberThreatIntel payload into resolved threats: duplicates within the payload
+    (same CVE, or similar names for the same product) are merged first.
+    Returns {entity_id: (kind, threat)}.
+    """
+    items = []
+    for field, kind in (("known_threats", "known"), ("emerging_threats", "emerging")):
+        for threat in threat_data.get(field) or []:
+            if hasattr(threat, "model_dump"):
+                threat = threat.model_dump()
+            items.append((kind, threat))
+    return {entity_id(kind, threat): (kind, threat) for kind, threat in resolve_threats(items)}
+
+
+def find_stored_entity(kind: str, threat: dict):
+    """
+    Looks for an already stored record of the same entity: a record with the threat's CVE
+    (its ID may be name-based, if it was stored before the CVE was known), else a record
+    in the threat's (kind, product_key) block.
+    Returns (id, threat, metadata) or None.
+    """
+    cve = canonical_cve(threat.get("cve_id"))
+    if cve:
+        found = collection.get(where={"cve_id": cve}, limit=1, include=["documents", "metadatas"])
+        if found["ids"]:
+            return found["ids"][0], json.loads(found["documents"][0]), found["metadatas"][0]
+    where = {"$and": [{"kind": kind}, {"product_key": product_key(threat.get("affected_product"))}]}
+    block = collection.get(where=where, include=["documents", "metadatas"])
+    for stored_id, document, metadata in zip(block["ids"], block["documents"], block["metadatas"]):
+        stored = json.loads(document)
+        if same_entity(kind, stored, threat):
+            return stored_id, stored, metadata
+    return None
+
 
 @tool
-def store_in_chromadb(threat_data: dict) -> str:
+def store_in_chromadb(threat_data: dict, source_url: str = "") -> str:
     """
-    Stores extracted threat intelligence in ChromaDB.
+    Stores extracted threat intelligence in ChromaDB, one record per known or emerging threat.
+    Duplicates of an already stored threat are merged into it (references accumulate).
     - threat_data: A dictionary containing known and emerging cybersecurity threats.
+    - source_url: URL of the analyzed report, as given in the task (falls back to the threat's first
+      reference when missing).
     
     Returns: Confirmation message.
     """
     try:
-        # Convert dictionary to JSON string for storage
-        json_data = json.dumps(threat_data, indent=2)
+        records = threat_records(threat_data)
+        if not records:
+            return "No threats found in the given data, nothing stored."
 
-        # Store in ChromaDB
-        collection.add(
-            documents=[json_data],  # Store as JSON string
-            metadatas=[{"source": "cybersecurity_report"}],
-            ids=[str(hash(json_data))]
-        )
+        stored = collection.get(ids=list(records), include=["documents", "metadatas"])
+        stored_by_id = {
+            stored_id: (stored_id, json.loads(document), metadata)
+            for stored_id, document, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        }
+        writes = {}
+        indexed = []
+        unchanged = 0
+        for record_id, (kind, threat) in records.items():
+            match = stored_by_id.get(record_id) or find_stored_entity(kind, threat)
+            if match:
+                record_id, stored_threat, stored_metadata = match
+                if record_id in writes:  # Two resolved threats matched the same stored entity
+                    stored_threat = json.loads(writes[record_id][0])
+                merged = merge_threats(stored_threat, threat)
+                if merged == stored_threat:
+                    unchanged += 1
+                else:
+                    writes[record_id] = (json.dumps(merged, indent=2),
+                                         threat_metadata(kind, merged, stored_metadata.get("source_url", source_url)))
+            else:
+                merged = threat
+                writes[record_id] = (json.dumps(merged, indent=2), threat_metadata(kind, merged, source_url))
+            indexed.append((record_id, merged, threat_metadata(kind, threat, source_url).get("source_url", "")))
 
-        return "Threat intelligence successfully stored in ChromaDB."
+        if writes:
+            collection.upsert(
+                ids=list(writes),
+                documents=[document for document, _ in writes.values()],  # Store as JSON string
+                metadatas=[metadata for _, metadata in writes.values()],
+            )
+            mark_written()
+        # Indexed for every threat, so a known threat seen in a new article gains that source
+        threat_index.add_many(indexed)
+
+        return (f"Threat intelligence successfully stored in ChromaDB: {len(writes)} new or merged threat(s), "
+                f"{unchanged} already stored.")
 
     except Exception as e:
         return f"Error storing data in ChromaDB: {str(e)}"
-
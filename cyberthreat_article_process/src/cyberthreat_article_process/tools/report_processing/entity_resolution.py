@@ -0,0 +1,143 @@
+import difflib
+import hashlib
+import re
+
+CVE_PATTERN = re.compile(r"CVE[\s_\-]*(\d{4})[\s_\-]*(\d+)", re.IGNORECASE)
+PRODUCT_STOPWORDS = {"the", "inc", "corp", "corporation", "ltd", "llc", "co", "software", "product", "products"}
+LIST_FIELDS = ("references", "mitre_attck_techniques")
+
+
+def canonical_cve(value):
+    """
+    "cve 2024 1234", "CVE_2024-1234", "cve-2024-1234" → "CVE-2024-1234"; None if there is no CVE ID.
+    """
+    match = CVE_PATTERN.search(str(value or ""))
+    return f"CVE-{match.group(1)}-{match.group(2)}" if match else None
+
+
+def product_key(product) -> str:
+    """
+    Normalized product key used to block candidate duplicates: lower-case words without
+    punctuation, version numbers or company suffixes ("Citrix Inc. NetScaler 13.1" → "citrix netscaler").
+    """
+    words = re.sub(r"[^a-z0-9]+", " ", str(product or "").lower()).split()
+    return " ".join(word for word in words if word not in PRODUCT_STOPWORDS and not re.fullmatch(r"v?\d+[\d.]*", word))
+
+
+def name_key(kind: str, threat: dict) -> str:
+    if kind == "known":
+        name = threat.get("name") or threat.get("threat_type")
+    else:
+        name = f"{threat.get('threat_type') or ''} {threat.get('affected_component') or ''}"
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", str(name or "").lower()).split())
+
+
+def name_similarity(a: str, b: str) -> float:
+    """
+    Best of the character-level ratio and the token overlap, so reordered words still match.
+    """
+    if not a or not b:
+        return 0.0
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    jaccard = len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+    return max(difflib.SequenceMatcher(None, a, b).ratio(), jaccard)
+
+
+def resolution_key(kind: str, threat: dict) -> str:
+    """
+    The entity a threat stands for: its CVE if it has one, else kind + product + name.
+    """
+    cve = canonical_cve(threat.get("cve_id"))
+    if cve:
+        return f"cve:{cve}"
+    return f"{kind}:{product_key(threat.get('affected_product'))}:{name_key(kind, threat)}"
+
+
+def entity_id(kind: str, threat: dict) -> str:
+    """
+    Deterministic ID of the canonical threat (same entity → same ID in every run).
+    """
+    return hashlib.sha256(resolution_key(kind, threat).encode("utf-8")).hexdigest()
+
+
+def same_entity(kind: str, a: dict, b: dict, threshold=0.85) -> bool:
+    cve_a, cve_b = canonical_cve(a.get("cve_id")), canonical_cve(b.get("cve_id"))
+    if cve_a and cve_b:
+        return cve_a == cve_b
+    return name_similarity(name_key(kind, a), name_key(kind, b)) >= threshold
+
+
+def merge_threats(primary: dict, other: dict) -> dict:
+    """
+    Merges a duplicate into the canonical threat: list fields are unioned (references accumulate),
+    the longer description wins, and fields missing in the canonical threat are filled in.
+    """
+    merged = dict(primary)
+    for field, value in other.items():
+        if field in LIST_FIELDS:
+            values = list(merged.get(field) or []) + list(value or [])
+            if field == "mitre_attck_techniques":
+                values = [technique.strip().upper() for technique in values]
+            merged[field] = list(dict.fromkeys(values)) or merged.get(field)
+        elif field == "description":
+            if len(str(value or "")) > len(str(merged.get(field) or "")):
+                merged[field] = value
+        elif merged.get(field) in (None, "", []):
+            merged[field] = value
+    if merged.get("cve_id"):
+        merged["cve_id"] = canonical_cve(merged["cve_id"]) or merged["cve_id"]
+    return merged
+
+
+def resolve_threats(items, threshold=0.85):
+    """
+    Entity resolution over (kind, threat) pairs:
+    - threats with the same canonical CVE are one entity;
+    - otherwise candidates are only compared within a (kind, product key) block,
+      and merged when their names are similar enough (never across different CVEs).
+    Returns the merged (kind, threat) list, one per entity, in first-seen order.
+    """
+    items = list(items)
+    parent = list(range(len(items)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Canonical CVE of each component (by root), so a CVE-less threat never bridges two CVEs
+    component_cve = {i: canonical_cve(threat.get("cve_id")) for i, (_, threat) in enumerate(items)}
+
+    def union(i, j):
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            return
+        cve_i, cve_j = component_cve[root_i], component_cve[root_j]
+        if cve_i and cve_j and cve_i != cve_j:
+            return
+        root, child = min(root_i, root_j), max(root_i, root_j)
+        parent[child] = root
+        component_cve[root] = cve_i or cve_j
+
+    by_cve = {}
+    blocks = {}
+    for i, (kind, threat) in enumerate(items):
+        cve = component_cve[i]
+        if cve:
+            by_cve.setdefault(cve, []).append(i)
+        blocks.setdefault((kind, product_key(threat.get("affected_product"))), []).append(i)
+    for indexes in by_cve.values():
+        for i in indexes[1:]:
+            union(indexes[0], i)
+    for (kind, _), indexes in blocks.items():
+        for position, i in enumerate(indexes):
+            for j in indexes[position + 1:]:
+                if find(i) != find(j) and same_entity(kind, items[i][1], items[j][1], threshold):
+                    union(i, j)
+
+    merged = {}
+    for i, (kind, threat) in enumerate(items):
+        root = find(i)
+        merged[root] = (kind, merge_threats(merged[root][1], threat)) if root in merged else (kind, merge_threats(threat, {}))
+    return [merged[root] for root in sorted(merged)]
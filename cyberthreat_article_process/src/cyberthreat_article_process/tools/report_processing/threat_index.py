@@ -0,0 +1,132 @@
+import os
+import re
+import sqlite3
+import threading
+
+
+def normalize_key(kind: str, value: str) -> str:
+    """
+    Canonical form of an index key, so lookups match regardless of the LLM's formatting:
+    CVE IDs and ATT&CK techniques upper-case, products lower-case, whitespace collapsed.
+    """
+    value = re.sub(r"\s+", " ", str(value)).strip()
+    if kind in ("cve", "technique"):
+        return value.upper().replace(" ", "")
+    if kind == "product":
+        return value.lower()
+    return value
+
+
+class ThreatIndex:
+    """
+    Incrementally maintained inverted index (SQLite) from threat entities to threat records
+    and the articles they were reported in.
+    Keys: "cve" (cve_id), "technique" (mitre_attck_techniques), "product" (affected_product),
+    "reference" (references). Lookups are B-tree range scans, prefixes included.
+    """
+    KINDS = ("cve", "technique", "product", "reference")
+
+    def __init__(self, path="./db/threat_index.sqlite"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, threat_id TEXT NOT NULL, source_url TEXT NOT NULL DEFAULT '', "
+            "PRIMARY KEY (kind, key, threat_id, source_url))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS postings_threat ON postings (threat_id)")
+        self.conn.commit()
+
+    def entities(self, threat: dict):
+        """
+        Yields the (kind, key) pairs a threat is indexed under.
+        """
+        if threat.get("cve_id"):
+            yield "cve", normalize_key("cve", threat["cve_id"])
+        for technique in threat.get("mitre_attck_techniques") or []:
+            yield "technique", normalize_key("technique", technique)
+        if threat.get("affected_product"):
+            yield "product", normalize_key("product", threat["affected_product"])
+        for reference in threat.get("references") or []:
+            yield "reference", normalize_key("reference", reference)
+
+    def add(self, threat_id: str, threat: dict, source_url: str = ""):
+        self.add_many([(threat_id, threat, source_url)])
+
+    def add_many(self, entries):
+        """
+        Indexes (threat_id, threat, source_url) entries; re-adding an entry is a no-op.
+        """
+        rows = [
+            (kind, key, threat_id, source_url or "")
+            for threat_id, threat, source_url in entries
+            for kind, key in self.entities(threat)
+            if key
+        ]
+        with self.lock:
+            self.conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?, ?)", rows)
+            self.conn.commit()
+
+    def lookup(self, kind: str, key: str, prefix=False):
+        """
+        Returns the IDs of the threats indexed under the key (or any key starting with it).
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown index key '{kind}', expected one of {self.KINDS}")
+        key = normalize_key(kind, key)
+        with self.lock:
+            if prefix:
+                rows = self.conn.execute(
+                    "SELECT DISTINCT threat_id FROM postings WHERE kind = ? AND key >= ? AND key < ?",
+                    (kind, key, key + "\U0010ffff"),
+                )
+            else:
+                rows = self.conn.execute(
+                    "SELECT DISTINCT threat_id FROM postings WHERE kind = ? AND key = ?", (kind, key)
+                )
+            return {row[0] for row in rows}
+
+    def query(self, prefix=False, **criteria):
+        """
+        Intersects lookups, e.g. query(cve="CVE-2024-", product="citrix netscaler", prefix=True)
+        or query(technique=["T1190", "T1059"]). Every given key must match.
+        Returns the sorted IDs of the matching threats.
+        """
+        result = None
+        for kind, keys in criteria.items():
+            for key in [keys] if isinstance(keys, str) else keys:
+                ids = self.lookup(kind, key, prefix)
+                result = ids if result is None else result & ids
+                if not result:
+                    return []
+        return sorted(result or [])
+
+    def sources(self, threat_ids):
+        """
+        Returns {threat_id: [source article URLs]} for the given threats.
+        """
+        threat_ids = list(threat_ids)
+        sources = {threat_id: set() for threat_id in threat_ids}
+        with self.lock:
+            for i in range(0, len(threat_ids), 500):
+                chunk = threat_ids[i:i + 500]
+                rows = self.conn.execute(
+                    "SELECT DISTINCT threat_id, source_url FROM postings "
+                    f"WHERE threat_id IN ({','.join('?' * len(chunk))}) AND source_url != ''",
+                    chunk,
+                )
+                for threat_id, source_url in rows:
+                    sources[threat_id].add(source_url)
+        return {threat_id: sorted(urls) for threat_id, urls in sources.items()}
+
+    def articles(self, prefix=False, **criteria):
+        """
+        Source article URLs of the threats matching query(**criteria).
+        """
+        urls = set()
+        for threat_urls in self.sources(self.query(prefix=prefix, **criteria)).values():
+            urls.update(threat_urls)
+        return sorted(urls)
@@ -0,0 +1,23 @@
+from cyberthreat_article_process.search.bm25_index import BM25Index
+
+
+def build_index(tmp_path):
+    index = BM25Index(str(tmp_path / "terms.sqlite"))
+    index.add_many([
+        ("a", "Palo Alto fixes CVE-2024-3400 in PAN-OS, exploited since March 2024"),
+        ("b", "Ivanti patches CVE-2024-21887 after attacks in January 2024"),
+        ("c", "LockBit ransomware affiliate arrested, CVE-2024-1709 used for access in 2024"),
+    ])
+    return index
+
+
+def test_identifier_is_matched_whole(tmp_path):
+    assert [doc_id for doc_id, _ in build_index(tmp_path).search("CVE-2024-3400")] == ["a"]
+
+
+def test_unknown_identifier_does_not_match_its_common_parts(tmp_path):
+    assert build_index(tmp_path).search("CVE-2024-99999") == []
+
+
+def test_unknown_identifier_falls_back_to_rare_parts(tmp_path):
+    assert [doc_id for doc_id, _ in build_index(tmp_path).search("pan-os-11")] == ["a"]
@@ -0,0 +1,28 @@
+from cyberthreat_article_process.embeddings.chunker import chunk_text
+
+
+def words(prefix, count):
+    return " ".join(f"{prefix}{n}" for n in range(count))
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_text("a b c\nd e", max_words=10, overlap_words=2) == ["a b c d e"]
+
+
+def test_overlap_is_carried_before_a_full_length_paragraph():
+    text = words("a", 5) + "\n" + words("b", 10)
+    chunks = [chunk.split() for chunk in chunk_text(text, max_words=10, overlap_words=3)]
+    assert chunks[0] == words("a", 5).split()
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk[:3] == previous[-3:]
+    assert all(len(chunk) <= 10 for chunk in chunks)
+    assert list(dict.fromkeys(word for chunk in chunks for word in chunk)) == text.split()
+
+
+def test_long_paragraph_windows_overlap_and_stay_within_max_words():
+    text = words("w", 45)
+    chunks = [chunk.split() for chunk in chunk_text(text, max_words=10, overlap_words=4)]
+    assert all(len(chunk) <= 10 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk[:4] == previous[-4:]
+    assert list(dict.fromkeys(word for chunk in chunks for word in chunk)) == text.split()
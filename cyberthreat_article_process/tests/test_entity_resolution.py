@@ -0,0 +1,38 @@
+from cyberthreat_article_process.tools.report_processing.entity_resolution import resolve_threats
+
+
+def threat(cve_id=None, name="NetScaler session hijacking", **fields):
+    return dict({"threat_type": "Vulnerability", "cve_id": cve_id, "name": name,
+                 "affected_product": "Citrix NetScaler", "references": []}, **fields)
+
+
+def test_same_cve_variants_are_merged():
+    resolved = resolve_threats([
+        ("known", threat("CVE-2024-1234", references=["r1"])),
+        ("known", threat("cve 2024 1234", references=["r2"], severity="9.8")),
+    ])
+    assert len(resolved) == 1
+    _, merged = resolved[0]
+    assert merged["cve_id"] == "CVE-2024-1234"
+    assert merged["references"] == ["r1", "r2"]
+    assert merged["severity"] == "9.8"
+
+
+def test_cve_less_threat_does_not_bridge_two_cves():
+    resolved = resolve_threats([
+        ("known", threat("CVE-2024-1")),
+        ("known", threat(None)),
+        ("known", threat("CVE-2024-2")),
+    ])
+    assert sorted(merged["cve_id"] for _, merged in resolved) == ["CVE-2024-1", "CVE-2024-2"]
+
+
+def test_cve_less_threat_joins_at_most_one_cve():
+    resolved = resolve_threats([
+        ("known", threat("CVE-2023-4966")),
+        ("known", threat(None, references=["r1"])),
+        ("known", threat("CVE-2023-6548")),
+    ])
+    by_cve = {merged["cve_id"]: merged for _, merged in resolved}
+    assert sorted(by_cve) == ["CVE-2023-4966", "CVE-2023-6548"]
+    assert by_cve["CVE-2023-4966"]["references"] == ["r1"]
@@ -0,0 +1,17 @@
+import pytest
+
+pytest.importorskip("bs4")
+
+from cyberthreat_article_process.crawler.html_parsers import available_parsers, get_parser
+
+PAGE = """<html><head><title>Patch Tuesday</title></head><body>
+<div class="byline"><span class="author vcard"><a rel="author" href="/author/bk/">Brian Krebs</a></span></div>
+<article><p>First paragraph.</p><p>Second paragraph.</p></article>
+</body></html>"""
+
+
+@pytest.mark.parametrize("name", available_parsers())
+def test_backends_find_the_author_outside_the_article(name):
+    article = get_parser(name).parse_article(PAGE, "https://example.com/2024/05/patch/")
+    assert article["author"] == "Brian Krebs"
+    assert article["content"] == "First paragraph.\nSecond paragraph."
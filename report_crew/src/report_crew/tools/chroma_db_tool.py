@@ -1,32 +1,83 @@
 from crewai.tools import tool
 import chromadb
+import hashlib
 import json
 
 # Initialize ChromaDB client
 client = chromadb.PersistentClient(path="./chroma_db")
 collection = client.get_or_create_collection(name="cyber_threats")
 
+
+def threat_id(kind: str, threat: dict) -> str:
+    """
+    Deterministic, content-addressed ID of a threat (same threat → same ID in every process).
+    """
+    canonical = json.dumps({"kind": kind, **threat}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def threat_metadata(kind: str, threat: dict, source_url: str) -> dict:
+    """
+    Filterable metadata of a threat; Chroma only accepts scalar values, so None is dropped
+    and the ATT&CK technique list is stored comma-separated.
+    """
+    references = threat.get("references") or []
+    metadata = {
+        "source": "cybersecurity_report",
+        "kind": kind,
+        "threat_type": threat.get("threat_type"),
+        "cve_id": (threat.get("cve_id") or "").strip().upper() or None,
+        "name": threat.get("name"),
+        "affected_product": threat.get("affected_product"),
+        "severity": threat.get("severity"),
+        "mitre_attck_techniques": ",".join(threat.get("mitre_attck_techniques") or []) or None,
+        "source_url": source_url or next((ref for ref in references if str(ref).startswith("http")), None),
+    }
+    return {key: str(value) for key, value in metadata.items() if value is not None}
+
+
+def threat_records(threat_data: dict, source_url: str = ""):
+    """
+    Splits a CyberThreatIntel payload into one (id, document, metadata) record per threat.
+    """
+    records = {}
+    for field, kind in (("known_threats", "known"), ("emerging_threats", "emerging")):
+        for threat in threat_data.get(field) or []:
+            if hasattr(threat, "model_dump"):
+                threat = threat.model_dump()
+            records[threat_id(kind, threat)] = (
+                json.dumps(threat, indent=2),
+                threat_metadata(kind, threat, source_url),
+            )
+    return records
+
+
 @tool
-def store_in_chromadb(threat_data: dict) -> str:
+def store_in_chromadb(threat_data: dict, source_url: str = "") -> str:
     """
-    Stores extracted threat intelligence in ChromaDB.
+    Stores extracted threat intelligence in ChromaDB, one record per known or emerging threat.
     - threat_data: A dictionary containing known and emerging cybersecurity threats.
+    - source_url: URL of the analyzed report (optional, defaults to the threat's first reference).
     
     Returns: Confirmation message.
     """
     try:
-        # Convert dictionary to JSON string for storage
-        json_data = json.dumps(threat_data, indent=2)
+        records = threat_records(threat_data, source_url)
+        if not records:
+            return "No threats found in the given data, nothing stored."
 
-        # Store in ChromaDB
-        collection.add(
-            documents=[json_data],  # Store as JSON string
-            metadatas=[{"source": "cybersecurity_report"}],
-            ids=[str(hash(json_data))]
-        )
+        # IDs are content-addressed: threats stored by an earlier run are skipped
+        existing = set(collection.get(ids=list(records), include=[]).get("ids") or [])
+        new_ids = [record_id for record_id in records if record_id not in existing]
+        if new_ids:
+            collection.add(
+                ids=new_ids,
+                documents=[records[record_id][0] for record_id in new_ids],  # Store as JSON string
+                metadatas=[records[record_id][1] for record_id in new_ids],
+            )
 
-        return "Threat intelligence successfully stored in ChromaDB."
+        return (f"Threat intelligence successfully stored in ChromaDB: {len(new_ids)} new threat(s), "
+                f"{len(existing)} already stored.")
 
     except Exception as e:
         return f"Error storing data in ChromaDB: {str(e)}"
-
@@ -4,6 +4,37 @@ import pdfplumber
 from bs4 import BeautifulSoup
 import json
 
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+BOILERPLATE_TAGS = ["script", "style", "header", "footer", "nav", "aside"]
+
+
+def html_to_text(html: str) -> str:
+    """
+    Readable text of a page without ads, navigation, footers, etc.
+    Uses selectolax (lexbor) when installed, otherwise BeautifulSoup on lxml or html.parser.
+    """
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(html)
+        for node in tree.css(", ".join(BOILERPLATE_TAGS)):
+            node.decompose()
+        root = tree.body or tree.root
+        return root.text(separator="\n", strip=True) if root else ""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    return soup.get_text(separator="\n", strip=True)
+
+
 @tool
 def parse_report(report_source: str, source_type: str) -> str:
     """
@@ -26,14 +57,8 @@ def parse_report(report_source: str, source_type: str) -> str:
             response = requests.get(report_source, timeout=10)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Remove unnecessary elements (ads, navigation, footers, etc.)
-            for tag in soup(["script", "style", "header", "footer", "nav", "aside"]):
-                tag.decompose()
-
             # Extract readable text content
-            text = soup.get_text(separator="\n", strip=True)
+            text = html_to_text(response.text)
             return text if text else "No readable content found on webpage."
         except Exception as e:
             return f"Error scraping webpage: {str(e)}"